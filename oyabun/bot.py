@@ -1,14 +1,35 @@
+import asyncio
+import heapq
+import time
+from contextlib import aclosing
 from contextlib import asynccontextmanager
+from contextlib import contextmanager
+from contextlib import nullcontext
+from contextvars import ContextVar
+from enum import IntEnum
 from io import BytesIO
 from pathlib import Path
+from typing import Any
 from typing import AsyncGenerator
-from typing import IO
+from typing import AsyncIterable
+from typing import AsyncIterator
+from typing import Awaitable
+from typing import cast
+from typing import ContextManager
+from typing import Iterable
+from typing import Iterator
+from typing import NamedTuple
 from typing import Type
 from typing import TypeVar
 
 import aiohttp
 import orjson
+from pydantic import ValidationError
+from yarl import URL
 
+from oyabun import errors
+from oyabun.ratelimit import RateLimiter
+from oyabun.retry import RetryPolicy
 from oyabun.telegram import AnswerCallbackQueryRequest
 from oyabun.telegram import AnswerCallbackQueryResponse
 from oyabun.telegram import Chat
@@ -22,6 +43,8 @@ from oyabun.telegram import EditMessageReplyMarkupResponse
 from oyabun.telegram import EditMessageTextRequest
 from oyabun.telegram import EditMessageTextResponse
 from oyabun.telegram import File
+from oyabun.telegram import get_lazy_type
+from oyabun.telegram import get_slots_type
 from oyabun.telegram import GetChatRequest
 from oyabun.telegram import GetChatResponse
 from oyabun.telegram import GetFileRequest
@@ -31,8 +54,13 @@ from oyabun.telegram import GetUpdatesRequest
 from oyabun.telegram import GetUpdatesResponse
 from oyabun.telegram import GetWebhookInfoResponse
 from oyabun.telegram import InlineKeyboardMarkup
+from oyabun.telegram import InputFile
+from oyabun.telegram import InputMediaDocument
+from oyabun.telegram import InputMediaPhoto
 from oyabun.telegram import Message
 from oyabun.telegram import MessageEntity
+from oyabun.telegram import SendMediaGroupRequest
+from oyabun.telegram import SendMediaGroupResponse
 from oyabun.telegram import SendMessageRequest
 from oyabun.telegram import SendMessageResponse
 from oyabun.telegram import SendPhotoRequest
@@ -42,9 +70,269 @@ from oyabun.telegram import SetWebhookResponse
 from oyabun.telegram import Update
 from oyabun.telegram import User
 from oyabun.telegram import WebhookInfo
+from oyabun.telegram.base import InputFileContentT
+from oyabun.telegram.base import PreparedRequest
 from oyabun.telegram.base import Request
+from oyabun.telegram.base import RequestTemplate
 from oyabun.telegram.base import Response
 from oyabun.telegram.entities import ReplyMarkupType
+from oyabun.telegram.slots import MODEL_BACKEND
+from oyabun.telegram.slots import SLOTS
+
+_ResultT = TypeVar("_ResultT")
+_V = TypeVar("_V")
+
+# input file contents which may be sent again
+REPLAYABLE_CONTENT_TYPES = (bytes, bytearray, memoryview, Path)
+
+
+async def _aiter(
+    values: Iterable[_V] | AsyncIterable[_V],
+) -> AsyncIterator[_V]:
+    if isinstance(values, AsyncIterable):
+        async for value in values:
+            yield value
+    else:
+        for value in values:
+            yield value
+
+
+class ConnectionPoolConfig(NamedTuple):
+    """
+    Settings of the connection pool of the session owned by the bot.
+
+    All the requests go to the single host of Bot API,
+    so the per-host limit is the one which matters.
+
+    Nagle's algorithm is always disabled (TCP_NODELAY) by aiohttp.
+
+    - dns_cache_ttl: seconds to cache resolved addresses, None is forever;
+    - keepalive_timeout: seconds to keep an idle connection open;
+    - limit: the total number of simultaneous connections, 0 is unlimited;
+    - limit_per_host: the same, but per host;
+    - proxy: an HTTP proxy URL to send all the requests through.
+    """
+
+    dns_cache_ttl: None | int = 300
+    keepalive_timeout: float = 60
+    limit: int = 100
+    limit_per_host: int = 100
+    proxy: None | str = None
+
+
+class ConnectionPoolStats(NamedTuple):
+    """
+    A snapshot of the connection pool.
+
+    - acquired: connections which are busy with requests;
+    - idle: open connections which wait for reuse;
+    - limit, limit_per_host: see `ConnectionPoolConfig`.
+    """
+
+    acquired: int
+    idle: int
+    limit: int
+    limit_per_host: int
+
+
+class BroadcastStats(NamedTuple):
+    """
+    Progress of the broadcast.
+
+    - elapsed: seconds since the broadcast has started;
+    - failed: the number of chats the message is not sent to;
+    - sent: the number of chats the message is sent to.
+    """
+
+    elapsed: float = 0
+    failed: int = 0
+    sent: int = 0
+
+    @property
+    def rate(self) -> float:
+        """
+        Messages sent per second.
+        """
+
+        return self.sent / self.elapsed if self.elapsed else 0
+
+
+class BroadcastResult(NamedTuple):
+    """
+    The result of the broadcast to a single chat.
+
+    Either the message or the error is set.
+    """
+
+    chat_id: int | str
+    error: None | errors.RequestError
+    message: None | Message
+    stats: BroadcastStats
+
+
+class Priority(IntEnum):
+    """
+    Priority classes of outgoing calls, the lower the sooner.
+    """
+
+    INTERACTIVE = 0
+    EDIT = 1
+    BULK = 2
+
+
+_current_priority: ContextVar[None | Priority] = ContextVar(
+    "_current_priority",
+    default=None,
+)
+
+
+class SendQueue:
+    """
+    The queue of outgoing calls with priority classes.
+
+    At most `max_in_flight` calls are performed at once,
+    the rest wait for a free slot, the most urgent ones first
+    and in the order of arrival within the same priority.
+
+    The priority of a call is taken from the current context
+    (see `SendQueue.priority`) or, by default, from the method.
+    Methods without a priority (e.g. `getUpdates`) bypass the queue.
+
+    Usage:
+
+        queue = SendQueue(max_in_flight=8)
+        bot = Bot(token, send_queue=queue)
+
+        with SendQueue.priority(Priority.BULK):
+            await bot.sendMessage(...)
+
+        future = queue.submit(bot.sendMessage(...), Priority.BULK)
+    """
+
+    PRIORITIES = {
+        "answerCallbackQuery": Priority.INTERACTIVE,
+        "deleteMessage": Priority.EDIT,
+        "editMessageCaption": Priority.EDIT,
+        "editMessageReplyMarkup": Priority.EDIT,
+        "editMessageText": Priority.EDIT,
+        "sendMediaGroup": Priority.INTERACTIVE,
+        "sendMessage": Priority.INTERACTIVE,
+        "sendPhoto": Priority.INTERACTIVE,
+    }
+
+    def __init__(
+        self,
+        *,
+        max_in_flight: int = 16,
+        priorities: None | dict[str, Priority] = None,
+    ):
+        """
+        :param max_in_flight: the max number of calls performed at once
+
+        :param priorities: default priorities of queued methods
+        """
+
+        assert max_in_flight > 0
+
+        self.max_in_flight = max_in_flight
+        self.priorities = self.PRIORITIES if priorities is None else priorities
+
+        self._counter = 0
+        self._in_flight = 0
+        self._waiters: list[tuple[Priority, int, asyncio.Future]] = []
+
+    @property
+    def in_flight(self) -> int:
+        """
+        The number of calls being performed.
+        """
+
+        return self._in_flight
+
+    @property
+    def pending(self) -> int:
+        """
+        The number of calls waiting for a slot.
+        """
+
+        return sum(not _w[2].done() for _w in self._waiters)
+
+    @staticmethod
+    @contextmanager
+    def priority(priority: Priority) -> Iterator[None]:
+        """
+        Sets the priority of calls made within the context.
+        """
+
+        token = _current_priority.set(priority)
+        try:
+            yield
+        finally:
+            _current_priority.reset(token)
+
+    def get_priority(self, method: str) -> Priority:
+        priority = _current_priority.get()
+        if priority is None:
+            priority = self.priorities.get(method, Priority.INTERACTIVE)
+
+        return priority
+
+    @asynccontextmanager
+    async def slot(self, priority: Priority) -> AsyncIterator[None]:
+        """
+        Holds the slot for a call, waiting for it if needed.
+        """
+
+        await self._acquire(priority)
+        try:
+            yield
+        finally:
+            self._release()
+
+    def submit(
+        self,
+        call: Awaitable[_ResultT],
+        priority: Priority,
+    ) -> "asyncio.Future[_ResultT]":
+        """
+        Schedules the call made with the given priority.
+
+        :return: the future of the call result
+        """
+
+        async def run() -> _ResultT:
+            with self.priority(priority):
+                return await call
+
+        return asyncio.ensure_future(run())
+
+    async def _acquire(self, priority: Priority) -> None:
+        # waiters are only queued while all the slots are held
+        if self._in_flight < self.max_in_flight:
+            self._in_flight += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, self._counter, future))
+        self._counter += 1
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # the slot has been handed over already
+                self._release()
+            raise
+
+    def _release(self) -> None:
+        while self._waiters:
+            *_, future = heapq.heappop(self._waiters)
+            if not future.done():
+                # hand the slot over
+                future.set_result(None)
+                return
+
+        self._in_flight -= 1
 
 
 class Bot:
@@ -55,34 +343,63 @@ class Bot:
 
     Usage: instantiate using bot token and go.
 
-    If something is wrong, you'll get the `Bot.RequestError` exception raised.
+    If something is wrong, you'll get the `Bot.RequestError` exception raised,
+    or rather one of its subclasses from `oyabun.errors`.
+
+    With OYABUN_MODEL_BACKEND=slots set in the environment
+    at import time, results are built as slots types
+    (see `oyabun.telegram.slots`) instead of pydantic models;
+    it implies `trust_responses`.
     """
 
-    TELEGRAM_BOT_API_URL = "https://api.telegram.org"
+    DOWNLOAD_CHUNK_SIZE = 2**16
 
-    class RequestError(RuntimeError):
-        """
-        A base exception for any internal error, including those
-        caused by malformed requests and invalid data.
-        """
+    JSON_HEADERS = {"Content-Type": "application/json"}
+
+    TELEGRAM_BOT_API_URL = "https://api.telegram.org"
 
-        pass
+    RequestError = errors.RequestError
 
     def __init__(
         self,
         token: str,
         *,
+        lazy_responses: bool = False,
+        pool: None | ConnectionPoolConfig = None,
+        rate_limiter: None | RateLimiter = None,
+        retry_policy: None | RetryPolicy = None,
+        send_queue: None | SendQueue = None,
         session: aiohttp.ClientSession | None = None,
+        trust_responses: bool = False,
     ):
         """
         Sets up the new Bot instance.
 
         :param token: a bot token which BotFather gives to you.
+        :param lazy_responses: build results from responses of the API
+        as lazy views, which decode nested objects on first access
+        (see `get_lazy_type`); implies `trust_responses`
+        and takes precedence over OYABUN_MODEL_BACKEND
+        :param pool: settings of the connection pool of bot's own session;
+        the proxy is used with an existing session as well
+        :param rate_limiter: paces sending messages to avoid flood errors
+        :param retry_policy: repeats calls failed for transient reasons
+        :param send_queue: orders calls by priority, limiting concurrency
         :param session: existing ClientSession or None (bot will use its own)
+        :param trust_responses: build results from responses of the API
+        without validation (see `TelegramBotApiType.decode`)
         """
 
+        self.__endpoints: dict[str, URL] = {}
+        self.__endpoints_base = self.TELEGRAM_BOT_API_URL
+        self.__lazy_responses = lazy_responses
+        self.__pool = pool or ConnectionPoolConfig()
+        self.__rate_limiter = rate_limiter
+        self.__retry_policy = retry_policy
+        self.__send_queue = send_queue
         self.__session = session
         self.__token = token
+        self.__trust_responses = trust_responses
 
     @asynccontextmanager
     async def client_session(
@@ -92,7 +409,16 @@ class Bot:
             yield self.__session
             return
 
-        async with aiohttp.ClientSession() as session:
+        pool = self.__pool
+        connector = aiohttp.TCPConnector(
+            keepalive_timeout=pool.keepalive_timeout,
+            limit=pool.limit,
+            limit_per_host=pool.limit_per_host,
+            ttl_dns_cache=pool.dns_cache_ttl,
+            use_dns_cache=True,
+        )
+
+        async with aiohttp.ClientSession(connector=connector) as session:
             prev = self.__session
             try:
                 self.__session = session
@@ -100,6 +426,31 @@ class Bot:
             finally:
                 self.__session = prev
 
+    @property
+    def pool_stats(self) -> None | ConnectionPoolStats:
+        """
+        The state of the connection pool of the current session.
+
+        :return: stats or None if there is no session yet
+        """
+
+        session = self.__session
+        if session is None or session.closed:
+            return None
+
+        connector = session.connector
+        if connector is None:
+            return None
+
+        # aiohttp has no public counters: the private ones are read
+        # without fallbacks, their layout is pinned by tests
+        return ConnectionPoolStats(
+            acquired=len(connector._acquired),
+            idle=sum(len(_conns) for _conns in connector._conns.values()),
+            limit=connector.limit,
+            limit_per_host=connector.limit_per_host,
+        )
+
     @property
     def api_url(self) -> str:
         """
@@ -143,6 +494,103 @@ class Bot:
             response_cls=AnswerCallbackQueryResponse,
         )
 
+    async def broadcast(
+        self,
+        chat_ids: Iterable[int | str] | AsyncIterable[int | str],
+        *,
+        text: str,
+        concurrency: int = 16,
+        parse_mode: None | str = None,
+        entities: None | list[MessageEntity] = None,
+        disable_web_page_preview: None | bool = None,
+        disable_notification: None | bool = None,
+        reply_markup: None | ReplyMarkupType = None,
+    ) -> AsyncGenerator[BroadcastResult, None]:
+        """
+        Sends the same text message to many chats.
+
+        The request is validated and serialized once,
+        only `chat_id` is serialized for each chat.
+
+        Calls are made with the bulk priority (see `SendQueue`)
+        and are paced by the rate limiter of the bot, if any.
+
+        :param chat_ids: chats to send the message to
+
+        :param concurrency: the max number of calls made at once
+
+        See `Bot.sendMessage` for the rest of params.
+
+        :return: an async iterator over results for each chat,
+        in the order of completion
+        """
+
+        assert concurrency > 0
+
+        template = RequestTemplate(
+            SendMessageRequest(
+                chat_id=0,
+                disable_notification=disable_notification,
+                disable_web_page_preview=disable_web_page_preview,
+                entities=entities,
+                parse_mode=parse_mode,
+                reply_markup=reply_markup,
+                text=text,
+            )
+        )
+
+        started = time.monotonic()
+        failed = sent = 0
+        pending: set[asyncio.Task[BroadcastResult]] = set()
+
+        def complete(task: asyncio.Task[BroadcastResult]) -> BroadcastResult:
+            nonlocal failed, sent
+
+            result = task.result()
+            if result.error is None:
+                sent += 1
+            else:
+                failed += 1
+
+            stats = BroadcastStats(
+                elapsed=time.monotonic() - started,
+                failed=failed,
+                sent=sent,
+            )
+
+            return result._replace(stats=stats)
+
+        try:
+            async for chat_id in _aiter(chat_ids):
+                if len(pending) >= concurrency:
+                    done, pending = await asyncio.wait(
+                        pending,
+                        return_when=asyncio.FIRST_COMPLETED,
+                    )
+                    for task in done:
+                        yield complete(task)
+
+                request = template.bind(chat_id)
+
+                # the task copies the context: the priority of the consumer,
+                # which runs the generator, is left as is
+                with SendQueue.priority(Priority.BULK):
+                    task = asyncio.create_task(self._send_to(request))
+
+                pending.add(task)
+
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                for task in done:
+                    yield complete(task)
+
+        finally:
+            for task in pending:
+                task.cancel()
+
     async def deleteMessage(
         self,
         *,
@@ -170,6 +618,8 @@ class Bot:
         """
         Downloads the file's content into the BytesIO object.
 
+        The object wraps the received bytes without copying them.
+
         https://core.telegram.org/bots/api#getfile
         https://core.telegram.org/bots/api#file
 
@@ -178,10 +628,79 @@ class Bot:
         :return: a BytesIO object with content of the file
         """
 
-        if not file.file_path:
-            raise self.RequestError(f"file {file} has no file_path set")
+        return await self._download_file(self._get_file_path(file))
+
+    async def downloadFileTo(
+        self,
+        *,
+        file: File,
+        path: Path,
+        chunk_size: int = DOWNLOAD_CHUNK_SIZE,
+    ) -> Path:
+        """
+        Downloads the file's content into the file on disk.
 
-        return await self._download_file(file.file_path)
+        The content is written chunk by chunk as it arrives,
+        so it is never held in memory as a whole.
+
+        The chunks go to a temporary file next to the path,
+        which replaces the path only when the download is complete:
+        on errors the path is left untouched.
+
+        https://core.telegram.org/bots/api#getfile
+        https://core.telegram.org/bots/api#file
+
+        :param file: a File object
+
+        :param path: a path to write the content to
+
+        :param chunk_size: a max size of a chunk in bytes
+
+        :return: the path
+        """
+
+        tmp = path.with_name(f".{path.name}.part")
+
+        try:
+            with tmp.open("wb") as stream:
+                async for chunk in self.streamFile(
+                    file=file, chunk_size=chunk_size
+                ):
+                    stream.write(chunk)
+
+            tmp.replace(path)
+
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+
+        return path
+
+    async def streamFile(
+        self,
+        *,
+        file: File,
+        chunk_size: int = DOWNLOAD_CHUNK_SIZE,
+    ) -> AsyncGenerator[bytes, None]:
+        """
+        Downloads the file's content chunk by chunk.
+
+        https://core.telegram.org/bots/api#getfile
+        https://core.telegram.org/bots/api#file
+
+        :param file: a File object
+
+        :param chunk_size: a max size of a chunk in bytes
+
+        :return: an async iterator over chunks of the content
+        """
+
+        file_path = self._get_file_path(file)
+
+        # the connection is released as soon as this one is closed
+        async with aclosing(self._stream_file(file_path, chunk_size)) as it:
+            async for chunk in it:
+                yield chunk
 
     async def editMessageCaption(
         self,
@@ -379,6 +898,55 @@ class Bot:
             response_cls=GetWebhookInfoResponse,
         )
 
+    async def sendMediaGroup(
+        self,
+        *,
+        chat_id: int | str,
+        media: list[InputMediaDocument | InputMediaPhoto],
+        disable_notification: None | bool = None,
+        reply_to_message_id: None | int = None,
+        allow_sending_without_reply: None | bool = None,
+    ) -> list[Message]:
+        """
+        Use this method to send a group of photos or documents as an album.
+
+        https://core.telegram.org/bots/api#sendmediagroup
+
+        :param chat_id: Unique identifier for the target chat
+        or username of the target channel
+        (in the format @channelusername).
+
+        :param media: A JSON-serialized array describing messages
+        to be sent, must include 2-10 items.
+        Each item may carry its own file to upload.
+
+        :param disable_notification: Sends the messages silently.
+        Users will receive a notification with no sound.
+
+        :param reply_to_message_id: If the messages are a reply,
+        ID of the original message.
+
+        :param allow_sending_without_reply: Pass True,
+        if the message should be sent
+        even if the specified replied-to message is not found.
+
+        :return: on success, a list of Messages that were sent.
+        """
+
+        request = SendMediaGroupRequest(
+            allow_sending_without_reply=allow_sending_without_reply,
+            chat_id=chat_id,
+            disable_notification=disable_notification,
+            media=media,
+            reply_to_message_id=reply_to_message_id,
+        )
+
+        return await self._call_api(
+            "sendMediaGroup",
+            request,
+            response_cls=SendMediaGroupResponse,
+        )
+
     async def sendMessage(
         self,
         *,
@@ -455,7 +1023,7 @@ class Bot:
         self,
         *,
         chat_id: int | str,
-        photo: str | Path | IO,
+        photo: str | InputFile | InputFileContentT,
         caption: None | str = None,  # 0-1024
         parse_mode: None | str = None,
         caption_entities: None | list[MessageEntity] = None,
@@ -478,7 +1046,9 @@ class Bot:
         that exists on the Telegram servers (recommended),
         pass an HTTP URL as a String for Telegram
         to get a photo from the Internet,
-        or upload a new photo using multipart/form-data.
+        or upload a new photo using multipart/form-data:
+        pass bytes, a path, a readable binary stream
+        or InputFile to set the filename and content type explicitly.
 
         The photo must be at most 10 MB in size.
         The photo's width and height must not exceed 10000 in total.
@@ -530,8 +1100,45 @@ class Bot:
             "sendPhoto", request, response_cls=SendPhotoResponse
         )
 
-    async def setWebhook(self, *, url: str) -> bool:
+    async def setWebhook(
+        self,
+        *,
+        url: str,
+        allowed_updates: None | list[str] = None,
+        drop_pending_updates: None | bool = None,
+        max_connections: None | int = None,
+        secret_token: None | str = None,
+    ) -> bool:
+        """
+        Use this method to specify a URL and receive incoming updates
+        via an outgoing webhook.
+
+        https://core.telegram.org/bots/api#setwebhook
+
+        :param url: HTTPS URL to send updates to.
+        Use an empty string to remove webhook integration.
+
+        :param allowed_updates: A JSON-serialized list
+        of the update types you want your bot to receive.
+
+        :param drop_pending_updates: Pass True to drop all pending updates.
+
+        :param max_connections: The maximum allowed number
+        of simultaneous HTTPS connections to the webhook
+        for update delivery, 1-100.
+
+        :param secret_token: A secret token to be sent in a header
+        "X-Telegram-Bot-Api-Secret-Token" in every webhook request,
+        1-256 characters.
+
+        :return: True on success.
+        """
+
         request = SetWebhookRequest(
+            allowed_updates=allowed_updates,
+            drop_pending_updates=drop_pending_updates,
+            max_connections=max_connections,
+            secret_token=secret_token,
             url=url,
         )
 
@@ -569,63 +1176,294 @@ class Bot:
         :return: object of response class' result type
         """
 
-        url = f"{self.api_url}/{method}"
+        url = self._get_endpoint(method)
 
-        try:
-            # for methods which do not need the request at all
-            request = request or Request()
+        # for methods which do not need the request at all
+        request = request or Request()
 
-            async with self.client_session() as session:
-                data: aiohttp.FormData | bytes
+        attempt = 0
+        started = time.monotonic()
 
-                with request.files() as files:
-                    if files:
-                        headers = {}
-                        data = aiohttp.FormData(
-                            {_f: str(_v) for _f, _v in request.dict().items()}
-                        )
-                        for field, stream in files.items():
-                            data.add_field(field, stream, filename="InputFile")
-                    else:
-                        headers = {"Content-Type": "application/json"}
-                        data = request.jsonb()
-
-                    kw = {}
-                    if timeout:
-                        kw["timeout"] = timeout * 2
-
-                    send_request = session.post(
-                        url,
-                        data=data,
-                        headers=headers,
-                        **kw,
+        try:
+            while True:
+                attempt += 1
+
+                try:
+                    status, body = await self._send(
+                        method, url, request, timeout
+                    )
+                except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+                    delay = self._get_retry_delay(method, request, attempt)
+                    if delay is None:
+                        raise errors.NetworkError(err) from err
+
+                    await asyncio.sleep(delay)
+                    continue
+
+                if status == 200:
+                    return self._parse_result(method, body, response_cls)
+
+                error = self._parse_error(body)
+
+                chat_id = self._get_migrated_chat_id(request, error)
+                if chat_id is not None:
+                    request = request.copy(update={"chat_id": chat_id})
+                    continue
+
+                delay = self._get_retry_delay(
+                    method,
+                    request,
+                    attempt,
+                    response=error,
+                    status=status,
+                )
+                if delay is None:
+                    raise errors.ApiError.build(
+                        error, body=body, status=status
                     )
 
-                    async with send_request as http_response:
-                        body = await http_response.read()
+                await asyncio.sleep(delay)
+
+        except self.RequestError as err:
+            err.elapsed = time.monotonic() - started
+            err.method = method
+            raise
+
+        except Exception as err:
+            raise self.RequestError(
+                err,
+                elapsed=time.monotonic() - started,
+                method=method,
+            ) from err
+
+    async def _send(
+        self,
+        method: str,
+        url: URL,
+        request: Request,
+        timeout: None | int,
+    ) -> tuple[int, bytes]:
+        """
+        Sends the request once,
+        paced by the rate limiter and ordered by the send queue.
+
+        :return: HTTP status and body of the response
+        """
+
+        limiter = self.__rate_limiter
+        if limiter is not None and method in limiter.methods:
+            await limiter.wait(getattr(request, "chat_id", None))
+
+        queue = self.__send_queue
+        if queue is not None and method in queue.priorities:
+            async with queue.slot(queue.get_priority(method)):
+                return await self._post_in_session(url, request, timeout)
+
+        return await self._post_in_session(url, request, timeout)
+
+    async def _send_to(self, request: PreparedRequest) -> BroadcastResult:
+        message = error = None
 
-                        if http_response.status != 200:
-                            raise self.RequestError(body.decode())
+        try:
+            message = await self._call_api(
+                "sendMessage",
+                request,
+                response_cls=SendMessageResponse,
+            )
+        except self.RequestError as err:
+            error = err
+
+        return BroadcastResult(
+            chat_id=request.chat_id,
+            error=error,
+            message=message,
+            stats=BroadcastStats(),
+        )
+
+    async def _post_in_session(
+        self,
+        url: URL,
+        request: Request,
+        timeout: None | int,
+    ) -> tuple[int, bytes]:
+        session = self.__session
+        if session is None:
+            async with self.client_session() as session:
+                return await self._post(session, url, request, timeout)
 
+        # the fast path: the session is bound already
+        return await self._post(session, url, request, timeout)
+
+    def _parse_result(
+        self,
+        method: str,
+        body: bytes,
+        response_cls: Type[Response[_T]],
+    ) -> _T:
+        try:
             payload = orjson.loads(body)
             if not payload:
-                err = f"unexpected empty payload on /{method}"
-                raise self.RequestError(err)
+                raise errors.ParseError(
+                    f"unexpected empty payload on /{method}"
+                )
 
             # actual&valid Telegram response
-            response = response_cls.parse_obj(payload)
+            if self.__lazy_responses:
+                response = get_lazy_type(response_cls).decode(payload)
+            elif MODEL_BACKEND == SLOTS:
+                # the equivalent of the response type
+                response = cast(
+                    "Response[Bot._T]",
+                    get_slots_type(response_cls).decode(payload),
+                )
+            elif self.__trust_responses:
+                response = response_cls.decode(payload)
+            else:
+                response = response_cls.parse_obj(payload)
+
+        except (
+            AttributeError,
+            orjson.JSONDecodeError,
+            TypeError,
+            ValidationError,
+        ) as err:
+            raise errors.ParseError(err) from err
+
+        if not response.ok:
+            raise errors.ApiError.build(response, body=body, status=200)
+
+        if response.result is None:
+            raise errors.ParseError(
+                f"unexpected null result on /{method} -> {response}"
+            )
+
+        return response.result
+
+    @staticmethod
+    def _parse_error(body: bytes) -> None | Response[Any]:
+        """
+        Parses the error response of the API.
 
-            if not response.ok:
-                raise self.RequestError(response.description)
+        :return: the response or None if the body is not the one
+        (e.g. an error page of a proxy)
+        """
 
-            if response.result is None:
-                err = f"unexpected null result on /{method} -> {response}"
-                raise self.RequestError(err)
+        try:
+            return Response.parse_obj(orjson.loads(body))
+        except (orjson.JSONDecodeError, ValidationError):
+            return None
 
-            return response.result
+    def _get_migrated_chat_id(
+        self,
+        request: Request,
+        error: None | Response[Any],
+    ) -> None | int:
+        policy = self.__retry_policy
+        if policy is None:
+            return None
+
+        return policy.get_migrated_chat_id(
+            getattr(request, "chat_id", None),
+            error,
+        )
 
-        except Exception as err:
-            raise self.RequestError(err) from err
+    def _get_retry_delay(
+        self,
+        method: str,
+        request: Request,
+        attempt: int,
+        *,
+        response: None | Response[Any] = None,
+        status: None | int = None,
+    ) -> None | float:
+        policy = self.__retry_policy
+        if policy is None:
+            return None
+
+        # streams are read once, they cannot be sent again
+        files = request._get_input_files().values()
+        if not all(
+            isinstance(_f.content, REPLAYABLE_CONTENT_TYPES) for _f in files
+        ):
+            return None
+
+        return policy.get_delay(
+            method,
+            attempt,
+            response=response,
+            status=status,
+        )
+
+    async def _post(
+        self,
+        session: aiohttp.ClientSession,
+        url: URL,
+        request: Request,
+        timeout: None | int,
+    ) -> tuple[int, bytes]:
+        """
+        Sends the request to the API.
+
+        :return: HTTP status and body of the response
+        """
+
+        data: aiohttp.FormData | bytes
+
+        # JSON-only requests skip the file machinery
+        files_context: ContextManager[dict[str, InputFile]] = (
+            request.files() if request.INPUT_FILE_FIELDS else nullcontext({})
+        )
+
+        with files_context as files:
+            if files:
+                headers = {}
+                data = aiohttp.FormData(request.form_fields())
+                for field, input_file in files.items():
+                    data.add_field(
+                        field,
+                        input_file.content,
+                        content_type=input_file.content_type,
+                        filename=input_file.filename,
+                    )
+            else:
+                headers = self.JSON_HEADERS
+                data = request.jsonb()
+
+            kw: dict[str, Any] = {"proxy": self.__pool.proxy}
+            if timeout:
+                kw["timeout"] = timeout * 2
+
+            send_request = session.post(
+                url,
+                data=data,
+                headers=headers,
+                **kw,
+            )
+
+            async with send_request as http_response:
+                body = await http_response.read()
+
+        return http_response.status, body
+
+    def _get_endpoint(self, method: str) -> URL:
+        """
+        Returns the prepared URL of the API method.
+
+        URLs are cached per method until the API URL changes.
+        """
+
+        if self.__endpoints_base != self.TELEGRAM_BOT_API_URL:
+            self.__endpoints.clear()
+            self.__endpoints_base = self.TELEGRAM_BOT_API_URL
+
+        url = self.__endpoints.get(method)
+        if url is None:
+            url = self.__endpoints[method] = URL(f"{self.api_url}/{method}")
+
+        return url
+
+    def _get_file_url(self, file_path: str) -> URL:
+        return URL(f"{self.file_url}/{file_path}")
 
     async def _download_file(
         self,
@@ -645,19 +1483,92 @@ class Bot:
         """
 
         try:
-            url = f"{self.file_url}/{file_path}"
+            url = self._get_file_url(file_path)
+
+            session = self.__session
+            if session is None:
+                async with self.client_session() as session:
+                    body = await self._get(session, url)
+            else:
+                body = await self._get(session, url)
+
+            # BytesIO shares the initial bytes until they are modified
+            return BytesIO(body)
+
+        except self.RequestError:
+            raise
+
+        except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+            raise errors.NetworkError(err) from err
+
+        except Exception as err:
+            raise self.RequestError(err) from err
+
+    async def _get(self, session: aiohttp.ClientSession, url: URL) -> bytes:
+        """
+        Downloads the whole content.
+
+        :return: a body of the successful HTTP response
+        """
+
+        async with session.get(url, proxy=self.__pool.proxy) as http_response:
+            body = await http_response.read()
+            if http_response.status != 200:
+                raise errors.ApiError.build(
+                    None,
+                    body=body,
+                    status=http_response.status,
+                )
+
+        return body
+
+    async def _stream_file(
+        self,
+        file_path: str,
+        chunk_size: int,
+    ) -> AsyncGenerator[bytes, None]:
+        """
+        Downloads a file using file path from API chunk by chunk.
+
+        https://core.telegram.org/bots/api#getfile
+        https://core.telegram.org/bots/api#file
+
+        :param file_path: File path.
+
+        :param chunk_size: a max size of a chunk in bytes
+
+        :return: an async iterator over chunks of the file content.
+        """
+
+        try:
+            url = self._get_file_url(file_path)
 
             async with self.client_session() as session:
-                async with session.get(url) as http_response:
-                    body = await http_response.read()
+                async with session.get(
+                    url, proxy=self.__pool.proxy
+                ) as http_response:
                     if http_response.status != 200:
-                        raise self.RequestError(body.decode())
+                        raise errors.ApiError.build(
+                            None,
+                            body=await http_response.read(),
+                            status=http_response.status,
+                        )
 
-            buffer = BytesIO()
-            buffer.write(body)
-            buffer.seek(0)
+                    content = http_response.content
+                    async for chunk in content.iter_chunked(chunk_size):
+                        yield chunk
 
-            return buffer
+        except self.RequestError:
+            raise
+
+        except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+            raise errors.NetworkError(err) from err
 
         except Exception as err:
             raise self.RequestError(err) from err
+
+    def _get_file_path(self, file: File) -> str:
+        if not file.file_path:
+            raise self.RequestError(f"file {file} has no file_path set")
+
+        return file.file_path
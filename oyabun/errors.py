@@ -0,0 +1,173 @@
+from typing import Any
+
+from oyabun.telegram import Response
+
+
+class RequestError(RuntimeError):
+    """
+    A base exception for any internal error, including those
+    caused by malformed requests and invalid data.
+    """
+
+    def __init__(
+        self,
+        message: Any,
+        *,
+        elapsed: None | float = None,
+        method: None | str = None,
+    ):
+        """
+        :param message: a description of the error
+
+        :param elapsed: seconds spent on the call, including retries
+
+        :param method: the API method called
+        """
+
+        super().__init__(message)
+        self.elapsed = elapsed
+        self.method = method
+
+
+class NetworkError(RequestError):
+    """
+    The call has failed on the transport level:
+    the connection is refused or broken, or the call is timed out.
+    """
+
+
+class ParseError(RequestError):
+    """
+    The response of the API is successful, but it cannot be parsed.
+    """
+
+
+class ApiError(RequestError):
+    """
+    The API has refused to perform the call.
+
+    https://core.telegram.org/bots/api#making-requests
+    """
+
+    def __init__(
+        self,
+        message: Any,
+        *,
+        elapsed: None | float = None,
+        error_code: None | int = None,
+        method: None | str = None,
+        migrate_to_chat_id: None | int = None,
+        retry_after: None | int = None,
+    ):
+        """
+        :param error_code: the error code of the API or the HTTP status
+
+        :param migrate_to_chat_id: the new id of the migrated group
+
+        :param retry_after: seconds to wait before the call is repeated
+        """
+
+        super().__init__(message, elapsed=elapsed, method=method)
+        self.error_code = error_code
+        self.migrate_to_chat_id = migrate_to_chat_id
+        self.retry_after = retry_after
+
+    @classmethod
+    def build(
+        cls,
+        response: None | Response[Any],
+        *,
+        body: bytes = b"",
+        elapsed: None | float = None,
+        method: None | str = None,
+        status: None | int = None,
+    ) -> "ApiError":
+        """
+        Creates the error of the most specific type.
+
+        :param response: the error response or None
+        if the response is not the one of the API
+
+        :param body: the raw body of the response
+
+        :param status: the HTTP status of the response
+        """
+
+        error_code = status
+        message = body.decode(errors="replace")
+        migrate_to_chat_id = retry_after = None
+
+        if response is not None:
+            error_code = response.error_code or status
+            message = response.description or message
+
+            if params := response.parameters:
+                migrate_to_chat_id = params.migrate_to_chat_id
+                retry_after = params.retry_after
+
+        error_cls: type[ApiError] = ApiError
+
+        if retry_after is not None:
+            error_cls = FloodWait
+        elif migrate_to_chat_id is not None:
+            error_cls = ChatMigrated
+        elif error_code is not None:
+            error_cls = ERRORS_BY_CODE.get(error_code, error_cls)
+            if error_code >= 500:
+                error_cls = ServerError
+
+        return error_cls(
+            message,
+            elapsed=elapsed,
+            error_code=error_code,
+            method=method,
+            migrate_to_chat_id=migrate_to_chat_id,
+            retry_after=retry_after,
+        )
+
+
+class BadRequest(ApiError):
+    """
+    The request is invalid (400).
+    """
+
+
+class ChatMigrated(ApiError):
+    """
+    The group has been migrated to a supergroup
+    with id `migrate_to_chat_id`.
+    """
+
+
+class FloodWait(ApiError):
+    """
+    Flood control is exceeded (429):
+    the call may be repeated after `retry_after` seconds.
+    """
+
+
+class Forbidden(ApiError):
+    """
+    The bot has no rights for the call (403),
+    e.g. it is blocked by the user or kicked from the group.
+    """
+
+
+class ServerError(ApiError):
+    """
+    The API has failed to handle the call (5xx).
+    """
+
+
+class Unauthorized(ApiError):
+    """
+    The bot token is invalid (401).
+    """
+
+
+ERRORS_BY_CODE: dict[int, type[ApiError]] = {
+    400: BadRequest,
+    401: Unauthorized,
+    403: Forbidden,
+    429: FloodWait,
+}
@@ -0,0 +1,230 @@
+import asyncio
+from typing import AsyncIterator
+
+from oyabun.bot import Bot
+from oyabun.telegram import Update
+
+
+class LongPolling:
+    """
+    The source of updates built on top of `Bot.getUpdates`.
+
+    The next poll is issued as soon as the previous batch is received,
+    so the batches are fetched in background while the consumer
+    is busy with the current one.
+
+    The number of prefetched batches is bounded:
+    when the consumer falls behind, polling waits for it.
+
+    The `limit` of each poll adapts to the load: it grows while
+    the batches come full and shrinks when they are sparse
+    or the consumer is behind.
+
+    Telegram forgets updates once a poll is issued past them.
+    By default, fetched batches are acknowledged by the next poll,
+    so updates which are fetched but not handled yet are lost
+    if the process crashes. With `auto_commit=False`, polls go on
+    from the offset the consumer has passed to `commit`:
+    Telegram keeps sending the updates which are not committed yet,
+    but only the new ones are yielded. A slow update does not hold
+    the others back, as long as they fit into the `limit` of a poll.
+
+    Usage:
+
+        async with LongPolling(bot, offset=offset) as polling:
+            async for update in polling:
+                ...
+    """
+
+    IDLE_DELAY = 0.5
+
+    MAX_LIMIT = 100
+
+    def __init__(
+        self,
+        bot: Bot,
+        *,
+        allowed_updates: None | list[str] = None,
+        auto_commit: bool = True,
+        idle_delay: float = IDLE_DELAY,
+        max_batches: int = 4,
+        max_error_delay: float = 30,
+        min_limit: int = 10,
+        offset: None | int = None,
+        timeout: int = 30,
+    ):
+        """
+        :param bot: a bot to poll updates with
+
+        :param allowed_updates: a list of update types to receive
+
+        :param auto_commit: whether fetched updates are acknowledged
+        by the next poll, before they are handled
+
+        :param idle_delay: a delay after a poll without new updates,
+        in seconds; keeps short polling (`timeout=0`) from spinning
+
+        :param max_batches: how many batches may wait for the consumer
+
+        :param max_error_delay: the upper bound of a delay
+        between failed polls, in seconds
+
+        :param min_limit: the lower bound of the adaptive `limit`
+
+        :param offset: identifier of the first update to be returned
+
+        :param timeout: timeout in seconds for long polling
+        """
+
+        assert max_batches > 0
+        assert 1 <= min_limit <= self.MAX_LIMIT
+
+        self._allowed_updates = allowed_updates
+        self._auto_commit = auto_commit
+        self._bot = bot
+        self._committed = asyncio.Event()
+        self._fetched = offset or 0
+        self._idle_delay = idle_delay
+        self._limit = min_limit
+        self._max_error_delay = max_error_delay
+        self._min_limit = min_limit
+        self._offset = offset
+        self._timeout = timeout
+
+        self._batches: asyncio.Queue[list[Update] | BaseException] = (
+            asyncio.Queue(maxsize=max_batches)
+        )
+        self._task: None | asyncio.Task = None
+
+    @property
+    def limit(self) -> int:
+        """
+        The `limit` to be used for the next poll.
+        """
+
+        return self._limit
+
+    @property
+    def offset(self) -> None | int:
+        """
+        The `offset` to be used for the next poll.
+        """
+
+        return self._offset
+
+    async def __aenter__(self) -> "LongPolling":
+        self.start()
+        return self
+
+    async def __aexit__(self, *_exc: object) -> None:
+        await self.stop()
+
+    def __aiter__(self) -> AsyncIterator[Update]:
+        return self._iter_updates()
+
+    async def batches(self) -> AsyncIterator[list[Update]]:
+        """
+        Yields updates grouped as they were received from the API.
+        """
+
+        self.start()
+
+        while True:
+            batch = await self._batches.get()
+            if isinstance(batch, BaseException):
+                raise batch
+
+            yield batch
+
+    def commit(self, offset: int) -> None:
+        """
+        Confirms that the updates before the offset are handled,
+        so the next poll acknowledges them.
+
+        Needed only with `auto_commit=False`.
+        """
+
+        if offset > (self._offset or 0):
+            self._offset = offset
+            self._committed.set()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._poll())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def _iter_updates(self) -> AsyncIterator[Update]:
+        async for batch in self.batches():
+            for update in batch:
+                yield update
+
+    async def _poll(self) -> None:
+        error_delay = 0.0
+
+        try:
+            while True:
+                # commits made since are seen by `_wait_idle`
+                self._committed.clear()
+
+                try:
+                    updates = await self._bot.getUpdates(
+                        allowed_updates=self._allowed_updates,
+                        limit=self._limit,
+                        offset=self._offset,
+                        timeout=self._timeout,
+                    )
+                except Bot.RequestError:
+                    error_delay = min(
+                        max(error_delay * 2, 1),
+                        self._max_error_delay,
+                    )
+                    await asyncio.sleep(error_delay)
+                    continue
+
+                error_delay = 0
+                self._adapt_limit(len(updates))
+
+                # the updates which are not committed come again
+                updates = [
+                    _u for _u in updates if _u.update_id >= self._fetched
+                ]
+
+                if not updates:
+                    await self._wait_idle()
+                    continue
+
+                self._fetched = max(_u.update_id for _u in updates) + 1
+                if self._auto_commit:
+                    self._offset = self._fetched
+
+                await self._batches.put(updates)
+
+        except Exception as err:  # noqa: B902
+            await self._batches.put(err)
+
+    async def _wait_idle(self) -> None:
+        # a commit lets Telegram send the updates beyond the limit
+        try:
+            await asyncio.wait_for(self._committed.wait(), self._idle_delay)
+        except asyncio.TimeoutError:
+            pass
+
+    def _adapt_limit(self, nr_updates: int) -> None:
+        limit = self._limit
+
+        if self._batches.qsize():
+            # the consumer is behind: do not let the backlog grow
+            limit //= 2
+        elif nr_updates >= limit:
+            limit *= 2
+        elif nr_updates < limit // 2:
+            limit //= 2
+
+        self._limit = max(self._min_limit, min(limit, self.MAX_LIMIT))
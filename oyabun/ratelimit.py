@@ -0,0 +1,240 @@
+import asyncio
+import time
+from collections import deque
+from typing import Callable
+from typing import NamedTuple
+
+
+class RateLimit(NamedTuple):
+    """
+    A number of calls allowed per period in seconds.
+    Calls up to the whole number may be done in a burst.
+    """
+
+    calls: int
+    period: float = 1
+
+
+class TokenBucket:
+    """
+    The classic token bucket.
+
+    The bucket holds up to `limit.calls` tokens and is refilled
+    continuously, gaining all of them back in `limit.period`.
+    Each call takes one token.
+    """
+
+    def __init__(self, limit: RateLimit, now: float):
+        assert limit.calls > 0
+        assert limit.period > 0
+
+        self._capacity = float(limit.calls)
+        self._rate = limit.calls / limit.period
+        self._tokens = self._capacity
+        self._updated = now
+
+    def delay(self, now: float) -> float:
+        """
+        Seconds to wait for a token to become available.
+        """
+
+        self._refill(now)
+
+        if self._tokens >= 1:
+            return 0
+
+        return (1 - self._tokens) / self._rate
+
+    def is_full(self, now: float) -> bool:
+        self._refill(now)
+
+        return self._tokens >= self._capacity
+
+    def take(self, now: float) -> None:
+        self._refill(now)
+        self._tokens -= 1
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(
+                self._capacity,
+                self._tokens + elapsed * self._rate,
+            )
+            self._updated = now
+
+
+class RateLimiter:
+    """
+    Paces calls to stay within the Telegram flood limits:
+
+    - the global limit of the bot: 30 messages per second;
+    - a private chat: 1 message per second;
+    - a group or a channel: 20 messages per minute.
+
+    Chats waiting for their turn are served round-robin,
+    so a chat with a long backlog does not hold the others.
+
+    Usage:
+
+        bot = Bot(token, rate_limiter=RateLimiter())
+
+    https://core.telegram.org/bots/faq#my-bot-is-hitting-limits-how-do-i-avoid-this
+    """
+
+    METHODS = frozenset(
+        {
+            "editMessageCaption",
+            "editMessageReplyMarkup",
+            "editMessageText",
+            "sendMediaGroup",
+            "sendMessage",
+            "sendPhoto",
+        }
+    )
+
+    def __init__(
+        self,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+        global_limit: RateLimit = RateLimit(30),
+        group_limit: RateLimit = RateLimit(20, 60),
+        methods: frozenset[str] = METHODS,
+        private_limit: RateLimit = RateLimit(1),
+    ):
+        """
+        :param clock: a monotonic clock in seconds
+
+        :param global_limit: the limit of all calls of the bot
+
+        :param group_limit: the limit of calls to a group or a channel
+
+        :param methods: API methods to be paced
+
+        :param private_limit: the limit of calls to a private chat
+        """
+
+        self.methods = methods
+
+        self._clock = clock
+        self._group_limit = group_limit
+        self._private_limit = private_limit
+
+        self._buckets: dict[int | str, TokenBucket] = {}
+        self._global = TokenBucket(global_limit, clock())
+        self._task: None | asyncio.Task = None
+        self._waiters: dict[None | int | str, deque[asyncio.Future]] = {}
+        self._wakeup = asyncio.Event()
+
+    @property
+    def pending(self) -> int:
+        """
+        The number of calls waiting for their turn.
+        """
+
+        return sum(len(_waiters) for _waiters in self._waiters.values())
+
+    async def wait(self, chat_id: None | int | str) -> None:
+        """
+        Waits until a call to the chat is allowed.
+
+        :param chat_id: a chat to call or None, if the call is not bound
+        to any chat (e.g. editing of inline messages)
+        """
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(chat_id, deque()).append(future)
+        self._wakeup.set()
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._schedule())
+
+        await future
+
+    def _get_bucket(
+        self,
+        chat_id: None | int | str,
+        now: float,
+    ) -> None | TokenBucket:
+        if chat_id is None:
+            return None
+
+        bucket = self._buckets.get(chat_id)
+
+        if bucket is None:
+            # private chats have positive ids, groups have negative ones,
+            # channels may be addressed by @username
+            is_private = isinstance(chat_id, int) and chat_id > 0
+            limit = self._private_limit if is_private else self._group_limit
+            bucket = self._buckets[chat_id] = TokenBucket(limit, now)
+
+        return bucket
+
+    def _grant(self, now: float) -> float:
+        """
+        Lets the first ready chat in the round make a call.
+
+        :return: 0 if the call is granted,
+        otherwise seconds to wait for any chat to get ready
+        """
+
+        delay = float("inf")
+
+        for chat_id in list(self._waiters):
+            waiters = self._waiters[chat_id]
+            while waiters and waiters[0].done():
+                # the caller has gone
+                waiters.popleft()
+
+            if not waiters:
+                del self._waiters[chat_id]
+                continue
+
+            bucket = self._get_bucket(chat_id, now)
+            if bucket is not None:
+                chat_delay = bucket.delay(now)
+                if chat_delay > 0:
+                    delay = min(delay, chat_delay)
+                    continue
+
+                bucket.take(now)
+
+            self._global.take(now)
+            waiters.popleft().set_result(None)
+
+            # move the chat to the end of the round
+            del self._waiters[chat_id]
+            if waiters:
+                self._waiters[chat_id] = waiters
+
+            return 0
+
+        return delay if self._waiters else 0
+
+    def _prune(self, now: float) -> None:
+        """
+        Drops buckets which are full: they are the same as new ones.
+        """
+
+        self._buckets = {
+            _chat_id: _bucket
+            for _chat_id, _bucket in self._buckets.items()
+            if not _bucket.is_full(now)
+        }
+
+    async def _schedule(self) -> None:
+        while self._waiters:
+            self._wakeup.clear()
+
+            now = self._clock()
+            delay = self._global.delay(now) or self._grant(now)
+            if delay <= 0:
+                continue
+
+            try:
+                # a new chat may be ready earlier
+                await asyncio.wait_for(self._wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+        self._prune(self._clock())
@@ -0,0 +1,167 @@
+import random
+from collections import Counter
+from typing import Any
+from typing import Callable
+
+from oyabun.telegram import Response
+
+
+class RetryPolicy:
+    """
+    Decides whether a failed API call is to be repeated and when.
+
+    - flood control: any method is repeated after `retry_after` seconds,
+      since Telegram has rejected the request without processing it;
+    - network errors and server errors (5xx): only safe methods
+      are repeated, with exponential backoff and full jitter,
+      since repeating the others may duplicate messages;
+    - a group migrated to a supergroup: the call is repeated
+      with the new chat id.
+
+    The numbers of retries are counted by reason in `counters`.
+
+    Usage:
+
+        bot = Bot(token, retry_policy=RetryPolicy())
+
+    https://core.telegram.org/bots/api#responseparameters
+    """
+
+    FLOOD = "flood"
+    MIGRATED = "migrated"
+    NETWORK = "network"
+    SERVER = "server"
+
+    SAFE_METHODS = frozenset(
+        {
+            "answerCallbackQuery",
+            "deleteMessage",
+            "deleteWebhook",
+            "editMessageCaption",
+            "editMessageReplyMarkup",
+            "editMessageText",
+            "getChat",
+            "getFile",
+            "getMe",
+            "getUpdates",
+            "getWebhookInfo",
+            "setWebhook",
+        }
+    )
+
+    def __init__(
+        self,
+        *,
+        attempts: int = 3,
+        backoff: float = 0.5,
+        follow_migration: bool = True,
+        jitter: Callable[[], float] = random.random,
+        max_backoff: float = 30,
+        max_retry_after: float = 60,
+        safe_methods: frozenset[str] = SAFE_METHODS,
+    ):
+        """
+        :param attempts: the max number of attempts of a call
+
+        :param backoff: the upper bound of the first backoff, in seconds;
+        it doubles with each attempt
+
+        :param follow_migration: whether to repeat the call
+        to a migrated group using the new chat id
+
+        :param jitter: a source of random factors in [0, 1)
+
+        :param max_backoff: the upper bound of any backoff, in seconds
+
+        :param max_retry_after: calls which Telegram asks to repeat
+        later than this, in seconds, fail immediately
+
+        :param safe_methods: API methods which are safe to repeat
+        """
+
+        assert attempts > 0
+
+        self.attempts = attempts
+        self.backoff = backoff
+        self.counters: Counter[str] = Counter()
+        self.follow_migration = follow_migration
+        self.jitter = jitter
+        self.max_backoff = max_backoff
+        self.max_retry_after = max_retry_after
+        self.safe_methods = safe_methods
+
+    def get_delay(
+        self,
+        method: str,
+        attempt: int,
+        *,
+        response: None | Response[Any] = None,
+        status: None | int = None,
+    ) -> None | float:
+        """
+        Calculates the delay before the next attempt.
+
+        :param method: the API method called
+
+        :param attempt: the number of the failed attempt, starting from 1
+
+        :param response: the error response of the API, if any
+
+        :param status: the HTTP status or None on network errors
+
+        :return: the delay in seconds or None if the call must fail
+        """
+
+        if attempt >= self.attempts:
+            return None
+
+        params = response.parameters if response else None
+        if params and params.retry_after is not None:
+            if params.retry_after > self.max_retry_after:
+                return None
+
+            self.counters[self.FLOOD] += 1
+            return params.retry_after
+
+        if method not in self.safe_methods:
+            return None
+
+        if status is None:
+            reason = self.NETWORK
+        elif status >= 500:
+            reason = self.SERVER
+        else:
+            return None
+
+        self.counters[reason] += 1
+
+        backoff: float = self.backoff * 2 ** (attempt - 1)
+
+        return self.jitter() * min(self.max_backoff, backoff)
+
+    def get_migrated_chat_id(
+        self,
+        chat_id: None | int | str,
+        response: None | Response[Any],
+    ) -> None | int:
+        """
+        Provides the new chat id to repeat the call with.
+
+        :param chat_id: the chat id the call was made with
+
+        :param response: the error response of the API, if any
+
+        :return: the chat id or None if the call must not be repeated
+        """
+
+        params = response.parameters if response else None
+        if not (self.follow_migration and params and chat_id is not None):
+            return None
+
+        new_chat_id = params.migrate_to_chat_id
+        if new_chat_id is None or new_chat_id == chat_id:
+            return None
+
+        self.counters[self.MIGRATED] += 1
+
+        return new_chat_id
@@ -1,7 +1,12 @@
 from typing import Type
 
 from oyabun.telegram.base import __models__ as __models__base
+from oyabun.telegram.base import CachedJsonType
+from oyabun.telegram.base import get_lazy_type
+from oyabun.telegram.base import InputFile
+from oyabun.telegram.base import PreparedRequest
 from oyabun.telegram.base import Request
+from oyabun.telegram.base import RequestTemplate
 from oyabun.telegram.base import Response
 from oyabun.telegram.base import ResponseParameters
 from oyabun.telegram.base import TelegramBotApiType
@@ -21,7 +26,11 @@ from oyabun.telegram.entities import File
 from oyabun.telegram.entities import ForceReply
 from oyabun.telegram.entities import InlineKeyboardButton
 from oyabun.telegram.entities import InlineKeyboardMarkup
+from oyabun.telegram.entities import InputMedia
+from oyabun.telegram.entities import InputMediaDocument
+from oyabun.telegram.entities import InputMediaPhoto
 from oyabun.telegram.entities import KeyboardButton
+from oyabun.telegram.entities import LazyUpdate
 from oyabun.telegram.entities import Location
 from oyabun.telegram.entities import MaskPosition
 from oyabun.telegram.entities import Message
@@ -48,6 +57,7 @@ from oyabun.telegram.requests import GetFileRequest
 from oyabun.telegram.requests import GetMeRequest
 from oyabun.telegram.requests import GetUpdatesRequest
 from oyabun.telegram.requests import GetWebhookInfoRequest
+from oyabun.telegram.requests import SendMediaGroupRequest
 from oyabun.telegram.requests import SendMessageRequest
 from oyabun.telegram.requests import SendPhotoRequest
 from oyabun.telegram.requests import SetWebhookRequest
@@ -63,9 +73,12 @@ from oyabun.telegram.responses import GetFileResponse
 from oyabun.telegram.responses import GetMeResponse
 from oyabun.telegram.responses import GetUpdatesResponse
 from oyabun.telegram.responses import GetWebhookInfoResponse
+from oyabun.telegram.responses import SendMediaGroupResponse
 from oyabun.telegram.responses import SendMessageResponse
 from oyabun.telegram.responses import SendPhotoResponse
 from oyabun.telegram.responses import SetWebhookResponse
+from oyabun.telegram.slots import get_slots_type
+from oyabun.telegram.slots import SlotsType
 
 __models__: set[Type[TelegramBotApiType]] = (
     __models__base
@@ -84,6 +97,7 @@ __all__ = (
     "BotCommand",
     "BotCommandScope",
     "BotCommandScopeDefault",
+    "CachedJsonType",
     "CallbackQuery",
     "Chat",
     "ChatLocation",
@@ -103,6 +117,8 @@ __all__ = (
     "EditMessageTextResponse",
     "File",
     "ForceReply",
+    "get_lazy_type",
+    "get_slots_type",
     "GetChatRequest",
     "GetChatResponse",
     "GetFileRequest",
@@ -115,23 +131,33 @@ __all__ = (
     "GetWebhookInfoResponse",
     "InlineKeyboardButton",
     "InlineKeyboardMarkup",
+    "InputFile",
+    "InputMedia",
+    "InputMediaDocument",
+    "InputMediaPhoto",
     "KeyboardButton",
+    "LazyUpdate",
     "Location",
     "MaskPosition",
     "Message",
     "MessageEntity",
     "PhotoSize",
+    "PreparedRequest",
     "ReplyKeyboardMarkup",
     "ReplyKeyboardRemove",
     "Request",
+    "RequestTemplate",
     "Response",
     "ResponseParameters",
+    "SendMediaGroupRequest",
+    "SendMediaGroupResponse",
     "SendMessageRequest",
     "SendMessageResponse",
     "SendPhotoRequest",
     "SendPhotoResponse",
     "SetWebhookRequest",
     "SetWebhookResponse",
+    "SlotsType",
     "Sticker",
     "Update",
     "User",
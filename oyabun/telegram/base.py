@@ -1,7 +1,14 @@
+import mimetypes
+import operator
 from contextlib import contextmanager
-from io import BytesIO
+from contextlib import ExitStack
+from datetime import datetime
+from datetime import timezone
+from io import IOBase
 from pathlib import Path
 from typing import Any
+from typing import Callable
+from typing import ClassVar
 from typing import Generator
 from typing import Generic
 from typing import IO
@@ -12,12 +19,22 @@ from typing import TypeVar
 import orjson
 from pydantic import BaseModel
 from pydantic import Field
+from pydantic import PrivateAttr
+from pydantic import ValidationError
+from pydantic.datetime_parse import parse_datetime
+from pydantic.fields import ModelField
+from pydantic.fields import SHAPE_LIST
+from pydantic.fields import SHAPE_SINGLETON
+from pydantic.json import pydantic_encoder
 
 
-def orjson_dumps(value: Any, *, default: Any) -> str:
+def orjson_dumps(value: Any, *, default: Any = None) -> str:
     return orjson.dumps(value, default=default).decode()
 
 
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
 class TelegramBotApiType(BaseModel):
     class Config:
         allow_population_by_field_name = True
@@ -25,6 +42,20 @@ class TelegramBotApiType(BaseModel):
         json_dumps = orjson_dumps
         json_loads = orjson.loads
 
+    @classmethod
+    def decode(cls: Type[ModelT], data: dict[str, Any]) -> ModelT:
+        """
+        Builds the object from trusted data, e.g. the one from Telegram,
+        skipping validation.
+
+        Nested objects are built the same way, timestamps are parsed.
+        Unknown keys are ignored, validators are not called.
+        Never use it for data which may be malformed.
+        """
+
+        obj: ModelT = _get_decoder(cls)(data)
+        return obj
+
     def _prepare_export_kw(self, kw: dict[str, Any]) -> None:
         kw.update(
             {
@@ -55,48 +86,672 @@ class TelegramBotApiType(BaseModel):
         return super().dict(**kw)
 
 
-class Request(TelegramBotApiType):
-    @contextmanager
-    def files(self) -> Iterator[dict[str, IO]]:
-        opened_files: list[IO] = []
-
-        def open_file(_path_or_io: Path | IO) -> IO:
-            if isinstance(_path_or_io, BytesIO):
-                return _path_or_io
-            assert isinstance(_path_or_io, Path)
-            _fp = _path_or_io.open("rb")
-            opened_files.append(_fp)
-            return _fp
-
-        try:
-            fields_streams = {
-                field: open_file(value)
-                for field, value in self._get_input_files().items()
-            }
+DecoderT = Callable[[Any], Any]
+
+IMMUTABLE_TYPES = (type(None), bool, int, float, str, bytes)
+
+_decoders: dict[type, DecoderT] = {}
+
+
+def _get_decoder(cls: type) -> DecoderT:
+    decoder = _decoders.get(cls)
+    if decoder is None:
+        decoder = _decoders[cls] = _compile_model_decoder(cls)
+
+    return decoder
+
+
+def _compile_model_decoder(cls: Type[BaseModel]) -> DecoderT:
+    """
+    Compiles the decoder of the model,
+    which builds objects the same way as `BaseModel.construct`.
+    """
+
+    by_alias = {
+        _field.alias: (_name, _compile_field_decoder(_field))
+        for _name, _field in cls.__fields__.items()
+    }
+
+    # mutable defaults must not be shared between objects
+    factories = {
+        _name: _field.get_default
+        for _name, _field in cls.__fields__.items()
+        if _field.default_factory is not None
+        or not isinstance(_field.default, IMMUTABLE_TYPES)  # noqa: W503
+    }
+
+    # in the order of fields, as validation does
+    defaults = {
+        _name: None if _name in factories else _field.default
+        for _name, _field in cls.__fields__.items()
+    }
+
+    has_private_attributes = bool(cls.__private_attributes__)
+
+    def decode(data: dict[str, Any]) -> BaseModel:
+        values = defaults.copy()
+        for name, factory in factories.items():
+            values[name] = factory()
+
+        fields_set = set()
+
+        for key, value in data.items():
+            entry = by_alias.get(key)
+            if entry is None:
+                continue
+
+            name, decoder = entry
+            if decoder is not None and value is not None:
+                value = decoder(value)
+
+            fields_set.add(name)
+            values[name] = value
+
+        obj = cls.__new__(cls)
+        object.__setattr__(obj, "__dict__", values)
+        object.__setattr__(obj, "__fields_set__", fields_set)
+        if has_private_attributes:
+            obj._init_private_attributes()
+
+        return obj
+
+    return decode
+
+
+def _compile_field_decoder(
+    field: ModelField,
+    *,
+    get_type: None | Callable[[type], type] = None,
+) -> None | DecoderT:
+    """
+    Compiles the decoder of the field value.
+
+    :param get_type: provides the type to build nested objects
+    instead of the model, e.g. its lazy view
+
+    :return: the decoder or None if the value is used as is
+    """
+
+    if field.shape == SHAPE_LIST and field.sub_fields:
+        item_decoder = _compile_field_decoder(
+            field.sub_fields[0],
+            get_type=get_type,
+        )
+        if item_decoder is None:
+            return None
+
+        return lambda _v: [item_decoder(_i) for _i in _v]
+
+    if field.shape != SHAPE_SINGLETON:
+        return _compile_validator(field)
+
+    if field.sub_fields:
+        # unions: values of simple types are used as is,
+        # objects are built as the only model of the union,
+        # anything else is validated
+        decoders = [
+            (_sub, _decoder)
+            for _sub in field.sub_fields
+            if (_decoder := _compile_field_decoder(_sub, get_type=get_type))
+        ]
+        if not decoders:
+            return None
+
+        if len(decoders) == 1 and _is_model_field(decoders[0][0]):
+            model_decoder = decoders[0][1]
+            return lambda _v: (
+                model_decoder(_v) if isinstance(_v, dict) else _v
+            )
+
+        return _compile_validator(field)
+
+    if _is_model_field(field):
+        # resolved on call: models may refer to themselves
+        model = field.type_
+        if get_type is not None:
+            return lambda _v: get_type(model).decode(_v)  # type: ignore
+
+        return model.decode  # type: ignore
+
+    if isinstance(field.type_, type) and issubclass(field.type_, datetime):
+        return _decode_datetime
+
+    return None
+
+
+def _is_model_field(field: ModelField) -> bool:
+    return (
+        field.shape == SHAPE_SINGLETON
+        and not field.sub_fields  # noqa: W503
+        and isinstance(field.type_, type)  # noqa: W503
+        and issubclass(field.type_, TelegramBotApiType)  # noqa: W503
+    )
+
+
+def _compile_validator(field: ModelField) -> DecoderT:
+    def validate(value: Any) -> Any:
+        value, errors = field.validate(value, {}, loc=field.alias)
+        if errors:
+            raise ValidationError([errors], BaseModel)
+
+        return value
+
+    return validate
+
+
+def _decode_datetime(value: Any) -> datetime:
+    if isinstance(value, int):
+        return datetime.fromtimestamp(value, timezone.utc)
+
+    return parse_datetime(value)
+
+
+_lazy_types: dict[type, type] = {}
+
+
+def get_lazy_type(cls: Type[ModelT]) -> Type[ModelT]:
+    """
+    Provides the lazy view of the model: a subclass which objects
+    are built from trusted data with `decode` and keep it as is.
+
+    A field is decoded on the first access to it and then cached.
+    Nested objects are lazy views too, so peeking at a couple of fields
+    of a big object does not build the rest of it.
+    Exporting, comparing or pickling the object decodes all fields.
+
+    The same rules as for `TelegramBotApiType.decode` apply:
+    never use it for data which may be malformed.
+    """
+
+    lazy_cls = _lazy_types.get(cls)
+    if lazy_cls is None:
+        lazy_cls = _lazy_types[cls] = _build_lazy_type(cls)
+
+    return lazy_cls
+
+
+def _build_lazy_type(cls: Type[ModelT]) -> Type[ModelT]:
+    # compiled on the first use: forward refs are resolved by then
+    by_alias: dict[str, str] = {}
+    fields: dict[str, tuple[str, None | DecoderT, Callable[[], Any]]] = {}
+
+    def compile_fields() -> None:
+        if fields:
+            return
+
+        for name, field in cls.__fields__.items():
+            decoder = _compile_field_decoder(
+                field,
+                get_type=get_lazy_type,
+            )
+            fields[name] = (field.alias, decoder, field.get_default)
+            by_alias[field.alias] = name
+
+    class LazyView(cls):  # type: ignore
+        _lazy_data: dict[str, Any] = PrivateAttr(default_factory=dict)
+
+        @classmethod
+        def decode(cls: Type[ModelT], data: dict[str, Any]) -> ModelT:
+            compile_fields()
+            fields_set = {by_alias[_k] for _k in data if _k in by_alias}
+
+            obj = cls.__new__(cls)
+            object.__setattr__(obj, "__dict__", {})
+            object.__setattr__(obj, "__fields_set__", fields_set)
+            obj._init_private_attributes()
+            object.__setattr__(obj, "_lazy_data", data)
+
+            return obj
+
+        def __getattr__(self, name: str) -> Any:
+            # called only for values missing in __dict__
+            compile_fields()
+            entry = fields.get(name)
+            if entry is None:
+                raise AttributeError(
+                    f"{type(self).__name__!r} object"
+                    f" has no attribute {name!r}"
+                )
+
+            alias, decoder, get_default = entry
+            data = self._lazy_data
+
+            if alias in data:
+                value = data[alias]
+                if decoder is not None and value is not None:
+                    value = decoder(value)
+            else:
+                value = get_default()
+
+            self.__dict__[name] = value
+            return value
+
+        def __getstate__(self) -> Any:
+            self._materialize()
+            return super().__getstate__()
+
+        def __repr_args__(self) -> Any:
+            self._materialize()
+            return super().__repr_args__()
+
+        def _iter(self, *args: Any, **kw: Any) -> Any:
+            self._materialize()
+            return super()._iter(*args, **kw)
+
+        def _materialize(self) -> None:
+            compile_fields()
+            if len(self.__dict__) == len(fields):
+                return
+
+            # in the order of fields, as validation does
+            values = {_name: getattr(self, _name) for _name in fields}
+            object.__setattr__(self, "__dict__", values)
+
+    LazyView.__name__ = f"Lazy{cls.__name__}"
+    LazyView.__qualname__ = LazyView.__name__
+    LazyView.__module__ = cls.__module__
+
+    return LazyView
+
+
+# containers with their items and the number of fields set
+SnapshotT = list[tuple[Any, tuple[Any, ...], int]]
+
+
+class CachedJsonType(TelegramBotApiType):
+    """
+    A type serialized once per instance.
+
+    Requests embed the cached JSON of such values as is,
+    so reusing the same object (e.g. a keyboard) is cheap.
+
+    Along with the JSON, the objects nested in the value
+    are recorded. Any change made since, assigning a field
+    or changing a nested object or list in place, drops the cache.
+    """
+
+    _jsonb: None | bytes = PrivateAttr(None)
+    _snapshot: SnapshotT = PrivateAttr(default_factory=list)
+
+    class Config:
+        # the very instance is kept in requests to reuse its cache
+        copy_on_model_validation = "none"
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        object.__setattr__(self, "_jsonb", None)
+
+    def copy(self: ModelT, **kw: Any) -> ModelT:
+        obj = super().copy(**kw)
+        # the snapshot refers to the objects of the original
+        object.__setattr__(obj, "_jsonb", None)
+        return obj
+
+    def jsonb(self, **kw: Any) -> bytes:  # noqa: A003, VNE003
+        if kw:
+            return super().jsonb(**kw)
+
+        if self._jsonb is None or not _is_unchanged(self._snapshot):
+            snapshot: SnapshotT = []
+            _take_snapshot(self, snapshot)
+            object.__setattr__(self, "_snapshot", snapshot)
+            object.__setattr__(self, "_jsonb", super().jsonb())
+
+        assert self._jsonb is not None
+        return self._jsonb
+
+
+def _get_items(value: Any) -> None | tuple[tuple[Any, ...], int]:
+    if isinstance(value, BaseModel):
+        return tuple(value.__dict__.values()), len(value.__fields_set__)
+
+    if isinstance(value, (list, tuple)):
+        return tuple(value), 0
+
+    if isinstance(value, dict):
+        return (*value.keys(), *value.values()), 0
+
+    return None
+
+
+def _take_snapshot(value: Any, snapshot: SnapshotT) -> None:
+    got = _get_items(value)
+    if got is None:
+        return
+
+    items, nr_set = got
+    snapshot.append((value, items, nr_set))
+    for item in items:
+        _take_snapshot(item, snapshot)
+
+
+def _is_unchanged(snapshot: SnapshotT) -> bool:
+    # the other values are immutable: JSON is the same
+    # while all the containers hold the very same objects
+    for container, items, nr_set in snapshot:
+        got = _get_items(container)
+        assert got is not None
+
+        current, current_nr_set = got
+        if current_nr_set != nr_set or len(current) != len(items):
+            return False
+
+        if not all(map(operator.is_, current, items)):
+            return False
 
-            yield fields_streams
-        finally:
-            for fp in opened_files:
-                fp.close()
+    return True
 
-    def _get_input_files(self) -> dict[str, Path | IO]:
-        fields_values: Generator[tuple[str, Any], None, None] = (
-            (attr, getattr(self, attr, None)) for attr in self.__fields__
+
+EncoderT = Callable[[Any], bytes]
+
+SerializerT = Callable[["Request"], bytes]
+
+_serializers: dict[type, SerializerT] = {}
+
+
+def _get_serializer(cls: Type["Request"]) -> SerializerT:
+    serializer = _serializers.get(cls)
+    if serializer is None:
+        serializer = _serializers[cls] = _compile_request_serializer(cls)
+
+    return serializer
+
+
+def _compile_request_serializer(cls: Type["Request"]) -> SerializerT:
+    """
+    Compiles the serializer of the request,
+    which builds the same JSON as `TelegramBotApiType.json`:
+    fields by alias, without unset and None values and input files.
+    """
+
+    entries = [
+        (_name, orjson.dumps(_field.alias) + b":", _compile_encoder(_field))
+        for _name, _field in cls.__fields__.items()
+    ]
+
+    has_input_files = bool(cls.INPUT_FILE_FIELDS)
+
+    def serialize(request: "Request") -> bytes:
+        excluded = request._get_input_files() if has_input_files else {}
+        fields_set = request.__fields_set__
+        values = request.__dict__
+
+        parts = [
+            key + encode(value)
+            for name, key, encode in entries
+            if name in fields_set
+            and (value := values[name]) is not None  # noqa: W503
+            and name not in excluded  # noqa: W503
+        ]
+
+        return b"{" + b",".join(parts) + b"}"
+
+    return serialize
+
+
+def _compile_encoder(field: ModelField) -> EncoderT:
+    if _may_contain_models(field):
+        return _encode_value
+
+    return _dumps
+
+
+def _may_contain_models(field: ModelField) -> bool:
+    if field.sub_fields:
+        return any(map(_may_contain_models, field.sub_fields))
+
+    return field.type_ is Any or (
+        isinstance(field.type_, type) and issubclass(field.type_, BaseModel)
+    )
+
+
+def _dumps(value: Any) -> bytes:
+    return orjson.dumps(value, default=pydantic_encoder)
+
+
+def _encode_value(value: Any) -> bytes:
+    if isinstance(value, TelegramBotApiType):
+        return value.jsonb()
+
+    if isinstance(value, list):
+        return b"[" + b",".join(map(_encode_value, value)) + b"]"
+
+    return _dumps(value)
+
+
+InputFileContentT = bytes | bytearray | memoryview | Path | IO[bytes]
+
+
+class InputFile:
+    """
+    This object represents the contents of a file to be uploaded.
+
+    The content may be given as bytes-like object,
+    a path to the file or any readable binary stream.
+    Files and streams are uploaded chunk by chunk,
+    without reading them into memory as a whole.
+
+    Unless given explicitly, the filename is taken
+    from the path or the stream name,
+    and the content type is guessed from the filename.
+
+    https://core.telegram.org/bots/api#inputfile
+    """
+
+    DEFAULT_CONTENT_TYPE = "application/octet-stream"
+    DEFAULT_FILENAME = "InputFile"
+
+    def __init__(
+        self,
+        content: InputFileContentT,
+        *,
+        content_type: None | str = None,
+        filename: None | str = None,
+    ):
+        """
+        :param content: the content of the file
+
+        :param content_type: a MIME type of the content
+
+        :param filename: a name of the file to tell Telegram
+        """
+
+        self.content = content
+        self.filename = (
+            filename or self._guess_filename(content) or self.DEFAULT_FILENAME
+        )
+        self.content_type = (
+            content_type
+            or mimetypes.guess_type(self.filename)[0]  # noqa: W503
+            or self.DEFAULT_CONTENT_TYPE  # noqa: W503
         )
 
-        fields_files: Generator[tuple[str, Path | IO], None, None] = (
-            field_value
-            for field_value in fields_values
-            if isinstance(field_value[1], (Path, BytesIO))
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}("
+            f"{type(self.content).__name__}, "
+            f"content_type={self.content_type!r}, "
+            f"filename={self.filename!r})"
+        )
+
+    @classmethod
+    def build(cls, value: Any) -> "None | InputFile":
+        """
+        Wraps the value into InputFile, if it is a file to be uploaded.
+
+        :return: InputFile object or None for any other value
+        """
+
+        if isinstance(value, InputFile):
+            return value
+
+        if isinstance(value, (bytes, bytearray, memoryview, Path)):
+            return cls(value)
+
+        if isinstance(value, IOBase) or callable(getattr(value, "read", None)):
+            return cls(value)
+
+        return None
+
+    @contextmanager
+    def open(self) -> Iterator["InputFile"]:  # noqa: A003
+        """
+        Provides InputFile with the content ready to be read.
+
+        The file is opened (and then closed) if the content is a path.
+        """
+
+        if not isinstance(self.content, Path):
+            yield self
+            return
+
+        with self.content.open("rb") as stream:
+            yield InputFile(
+                stream,
+                content_type=self.content_type,
+                filename=self.filename,
+            )
+
+    @staticmethod
+    def _guess_filename(content: InputFileContentT) -> None | str:
+        if isinstance(content, Path):
+            return content.name
+
+        name = getattr(content, "name", None)
+        if isinstance(name, str) and name:
+            return Path(name).name
+
+        return None
+
+
+class Request(TelegramBotApiType):
+    # fields which values may be files to upload;
+    # requests without them are always sent as JSON
+    INPUT_FILE_FIELDS: ClassVar[frozenset[str]] = frozenset()
+
+    def __init_subclass__(cls, **kw: Any) -> None:
+        super().__init_subclass__(**kw)
+
+        unknown = cls.INPUT_FILE_FIELDS - cls.__fields__.keys()
+        assert not unknown, f"unknown input file fields: {sorted(unknown)}"
+
+    def form_fields(self) -> dict[str, str]:
+        """
+        Provides values of the request as multipart/form-data fields.
+
+        Non-string values are serialized into JSON.
+        """
+
+        return {
+            field: value if isinstance(value, str) else orjson_dumps(value)
+            for field, value in self.dict().items()
+        }
+
+    @contextmanager
+    def files(self) -> Iterator[dict[str, InputFile]]:
+        """
+        Provides input files of the request, ready to be read.
+        """
+
+        with ExitStack() as stack:
+            yield {
+                field: stack.enter_context(input_file.open())
+                for field, input_file in self._get_input_files().items()
+            }
+
+    def _get_input_files(self) -> dict[str, InputFile]:
+        fields_files: Generator[tuple[str, InputFile], None, None] = (
+            (field, input_file)
+            for field in self.INPUT_FILE_FIELDS
+            if (input_file := InputFile.build(getattr(self, field, None)))
+            is not None
         )
 
         return dict(fields_files)
 
+    def json(self, **kw: Any) -> str:  # noqa: A003, VNE003
+        if kw:
+            return super().json(**kw)
+
+        return self.jsonb().decode()
+
+    def jsonb(self, **kw: Any) -> bytes:  # noqa: A003, VNE003
+        """
+        Serializes the request into JSON.
+
+        Unless export options are given, the serializer compiled
+        for the class is used, which embeds the cached JSON
+        of `CachedJsonType` values.
+        """
+
+        if kw:
+            return super().jsonb(**kw)
+
+        return _get_serializer(type(self))(self)
+
     def _prepare_export_kw(self, kw: dict[str, Any]) -> None:
-        kw["exclude"] = frozenset(self._get_input_files())
+        if self.INPUT_FILE_FIELDS:
+            kw["exclude"] = frozenset(self._get_input_files()) | frozenset(
+                kw.get("exclude", ())
+            )
         return super()._prepare_export_kw(kw)
 
 
+class RequestTemplate:
+    """
+    A request serialized once to be sent to many chats.
+
+    The body is split around `chat_id`,
+    so only the chat id is serialized for each chat.
+
+    Requests with input files cannot be templated.
+    """
+
+    CHAT_ID_FIELD = b'"chat_id":'
+
+    def __init__(self, request: Request):
+        assert "chat_id" in request.__fields__, "no chat_id in the request"
+        assert not request._get_input_files(), "input files in the request"
+
+        # a JSON string cannot contain an unescaped quote,
+        # so the only match is the key of the request itself
+        marker = self.CHAT_ID_FIELD + b"0"
+        body = request.copy(update={"chat_id": 0}).jsonb()
+        head, _marker, tail = body.partition(marker)
+
+        self._head = head + self.CHAT_ID_FIELD
+        self._tail = tail
+
+    def bind(self, chat_id: int | str) -> "PreparedRequest":
+        """
+        Provides the request to the chat.
+        """
+
+        return PreparedRequest.construct(chat_id=chat_id, template=self)
+
+    def render(self, chat_id: int | str) -> bytes:
+        """
+        Provides the body of the request to the chat.
+        """
+
+        return self._head + orjson.dumps(chat_id) + self._tail
+
+
+class PreparedRequest(Request):
+    """
+    A request to the chat made from the template.
+    """
+
+    chat_id: int | str = Field(...)
+    template: RequestTemplate = Field(...)
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def jsonb(self, **_kw: Any) -> bytes:  # noqa: A003, VNE003
+        return self.template.render(self.chat_id)
+
+
 class ResponseParameters(TelegramBotApiType):
     migrate_to_chat_id: None | int = Field(None)
     retry_after: None | int = Field(None)
@@ -135,6 +790,7 @@ class Response(Generic[ResponseResultT], TelegramBotApiType):
 BaseModelType = Type[BaseModel]
 
 __models__: set[Type[TelegramBotApiType]] = {
+    CachedJsonType,
     Request,
     Response,
     ResponseParameters,
@@ -143,7 +799,13 @@ __models__: set[Type[TelegramBotApiType]] = {
 
 __all__ = (
     "__models__",
+    "CachedJsonType",
+    "get_lazy_type",
+    "InputFile",
+    "InputFileContentT",
+    "PreparedRequest",
     "Request",
+    "RequestTemplate",
     "Response",
     "ResponseParameters",
     "TelegramBotApiType",
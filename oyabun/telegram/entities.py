@@ -1,9 +1,13 @@
 from datetime import datetime
+from typing import Any
 from typing import Optional
 from typing import Type
 
 from pydantic import Field
+from pydantic import root_validator
 
+from oyabun.telegram.base import CachedJsonType
+from oyabun.telegram.base import get_lazy_type
 from oyabun.telegram.base import TelegramBotApiType
 
 
@@ -181,7 +185,7 @@ class File(TelegramBotApiType):
     file_unique_id: str = Field(...)
 
 
-class ForceReply(TelegramBotApiType):
+class ForceReply(CachedJsonType):
     """
     Upon receiving a message with this object,
     Telegram clients will display a reply interface to the user
@@ -234,7 +238,7 @@ class InlineKeyboardButton(TelegramBotApiType):
     url: None | str = Field(None)
 
 
-class InlineKeyboardMarkup(TelegramBotApiType):
+class InlineKeyboardMarkup(CachedJsonType):
     """
     This object represents an inline keyboard
     that appears right next to the message it belongs to.
@@ -247,6 +251,57 @@ class InlineKeyboardMarkup(TelegramBotApiType):
     )
 
 
+class InputMedia(TelegramBotApiType):
+    """
+    This object represents the content of a media message to be sent.
+
+    https://core.telegram.org/bots/api#inputmedia
+    """
+
+    @root_validator(pre=True)
+    def _set_type(cls, values: dict[str, Any]) -> dict[str, Any]:
+        # type is a constant which must be exported anyway
+        type_field = cls.__fields__.get("type")
+        if type_field is not None:
+            values.setdefault("type", type_field.default)
+        return values
+
+
+class InputMediaDocument(InputMedia):
+    """
+    Represents a general file to be sent.
+
+    The media is a file_id, an HTTP URL or a file to upload
+    (see InputFile).
+
+    https://core.telegram.org/bots/api#inputmediadocument
+    """
+
+    caption: None | str = Field(None)
+    caption_entities: Optional[list["MessageEntity"]] = Field(None)
+    disable_content_type_detection: None | bool = Field(None)
+    media: Any = Field(...)
+    parse_mode: None | str = Field(None)
+    type: str = Field("document")  # noqa: A003,VNE003
+
+
+class InputMediaPhoto(InputMedia):
+    """
+    Represents a photo to be sent.
+
+    The media is a file_id, an HTTP URL or a file to upload
+    (see InputFile).
+
+    https://core.telegram.org/bots/api#inputmediaphoto
+    """
+
+    caption: None | str = Field(None)
+    caption_entities: Optional[list["MessageEntity"]] = Field(None)
+    media: Any = Field(...)
+    parse_mode: None | str = Field(None)
+    type: str = Field("photo")  # noqa: A003,VNE003
+
+
 class KeyboardButton(TelegramBotApiType):
     """
     This object represents one button of the reply keyboard.
@@ -372,7 +427,7 @@ class PhotoSize(TelegramBotApiType):
     width: int = Field(...)
 
 
-class ReplyKeyboardMarkup(TelegramBotApiType):
+class ReplyKeyboardMarkup(CachedJsonType):
     """
     This object represents a custom keyboard with reply options
     (see Introduction to bots for details and examples).
@@ -386,7 +441,7 @@ class ReplyKeyboardMarkup(TelegramBotApiType):
     resize_keyboard: bool = Field(False)
 
 
-class ReplyKeyboardRemove(TelegramBotApiType):
+class ReplyKeyboardRemove(CachedJsonType):
     """
     Upon receiving a message with this object,
     Telegram clients will remove the current custom keyboard
@@ -562,6 +617,10 @@ ReplyMarkupType = (
     | ReplyKeyboardRemove  # noqa: W503
 )
 
+# a lazy view of Update: nested objects are built on first access,
+# use LazyUpdate.decode(data) with data from Telegram
+LazyUpdate = get_lazy_type(Update)
+
 __models__: set[Type[TelegramBotApiType]] = {
     Audio,
     BotCommand,
@@ -578,6 +637,9 @@ __models__: set[Type[TelegramBotApiType]] = {
     ForceReply,
     InlineKeyboardButton,
     InlineKeyboardMarkup,
+    InputMedia,
+    InputMediaDocument,
+    InputMediaPhoto,
     KeyboardButton,
     Location,
     MaskPosition,
@@ -612,7 +674,11 @@ __all__ = (
     "ForceReply",
     "InlineKeyboardButton",
     "InlineKeyboardMarkup",
+    "InputMedia",
+    "InputMediaDocument",
+    "InputMediaPhoto",
     "KeyboardButton",
+    "LazyUpdate",
     "Location",
     "MaskPosition",
     "Message",
@@ -1,10 +1,14 @@
 from typing import Any
+from typing import ClassVar
 from typing import Type
 
 from pydantic import Field
 
+from oyabun.telegram.base import InputFile
 from oyabun.telegram.base import Request
 from oyabun.telegram.entities import InlineKeyboardMarkup
+from oyabun.telegram.entities import InputMediaDocument
+from oyabun.telegram.entities import InputMediaPhoto
 from oyabun.telegram.entities import MessageEntity
 from oyabun.telegram.entities import ReplyMarkupType
 
@@ -77,6 +81,48 @@ class GetWebhookInfoRequest(Request):
     pass
 
 
+class SendMediaGroupRequest(Request):
+    """
+    Files to upload are taken from the media items:
+    each one is attached as a separate part of the form
+    and referred to as "attach://<part name>" in its item.
+    """
+
+    INPUT_FILE_FIELDS: ClassVar[frozenset[str]] = frozenset({"media"})
+
+    allow_sending_without_reply: None | bool = Field(None)
+    chat_id: int | str = Field(...)
+    disable_notification: None | bool = Field(None)
+    media: list[InputMediaDocument | InputMediaPhoto] = Field(...)
+    reply_to_message_id: None | int = Field(None)
+
+    class Config:
+        smart_union = True
+
+    # defined before `dict` method which shadows the builtin type
+    def _get_input_files(self) -> dict[str, InputFile]:
+        items_files = (
+            (f"media{i}", InputFile.build(item.media))
+            for i, item in enumerate(self.media)
+        )
+
+        return {
+            name: input_file
+            for name, input_file in items_files
+            if input_file is not None
+        }
+
+    def dict(self, **kw: Any) -> dict:  # noqa: A003, VNE003
+        input_files = self._get_input_files()
+        dct = super().dict(**kw)
+
+        for i, item in enumerate(dct.get("media", ())):
+            if (name := f"media{i}") in input_files:
+                item["media"] = f"attach://{name}"
+
+        return dct
+
+
 class SendMessageRequest(Request):
     allow_sending_without_reply: None | bool = Field(None)
     chat_id: int | str = Field(...)
@@ -90,6 +136,8 @@ class SendMessageRequest(Request):
 
 
 class SendPhotoRequest(Request):
+    INPUT_FILE_FIELDS: ClassVar[frozenset[str]] = frozenset({"photo"})
+
     allow_sending_without_reply: None | bool = Field(None)
     caption: None | str = Field(None)
     caption_entities: None | list[MessageEntity] = Field(None)
@@ -102,11 +150,14 @@ class SendPhotoRequest(Request):
 
 
 class SetWebhookRequest(Request):
+    INPUT_FILE_FIELDS: ClassVar[frozenset[str]] = frozenset({"certificate"})
+
     allowed_updates: None | list[str] = Field(None)
     certificate: Any = Field(None)
     drop_pending_updates: None | bool = Field(None)
     ip_address: None | str = Field(None)
     max_connections: None | int = Field(None)
+    secret_token: None | str = Field(None)
     url: str = Field(...)
 
 
@@ -122,6 +173,7 @@ __models__: set[Type[Request]] = {
     GetMeRequest,
     GetUpdatesRequest,
     GetWebhookInfoRequest,
+    SendMediaGroupRequest,
     SendMessageRequest,
     SendPhotoRequest,
     SetWebhookRequest,
@@ -140,6 +192,7 @@ __all__ = (
     "GetMeRequest",
     "GetUpdatesRequest",
     "GetWebhookInfoRequest",
+    "SendMediaGroupRequest",
     "SendMessageRequest",
     "SendPhotoRequest",
     "SetWebhookRequest",
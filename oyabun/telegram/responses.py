@@ -55,6 +55,10 @@ class GetWebhookInfoResponse(Response[WebhookInfo]):
     result: None | WebhookInfo = Field(None)
 
 
+class SendMediaGroupResponse(Response[list[Message]]):
+    result: list[Message] = Field(default_factory=list)
+
+
 class SendMessageResponse(Response[Message]):
     result: None | Message = Field(None)
 
@@ -79,6 +83,7 @@ __models__: set[Type[Response]] = {
     GetMeResponse,
     GetUpdatesResponse,
     GetWebhookInfoResponse,
+    SendMediaGroupResponse,
     SendMessageResponse,
     SendPhotoResponse,
     SetWebhookResponse,
@@ -97,6 +102,7 @@ __all__ = (
     "GetMeResponse",
     "GetUpdatesResponse",
     "GetWebhookInfoResponse",
+    "SendMediaGroupResponse",
     "SendMessageResponse",
     "SendPhotoResponse",
     "SetWebhookResponse",
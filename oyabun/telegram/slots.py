@@ -0,0 +1,300 @@
+import os
+from types import FunctionType
+from typing import AbstractSet
+from typing import Any
+from typing import Callable
+from typing import ClassVar
+from typing import NamedTuple
+from typing import Type
+from typing import TypeVar
+
+import orjson
+from pydantic import BaseModel
+from pydantic.json import pydantic_encoder
+
+from oyabun.telegram.base import _compile_field_decoder
+from oyabun.telegram.base import DecoderT
+from oyabun.telegram.base import TelegramBotApiType
+
+PYDANTIC = "pydantic"
+SLOTS = "slots"
+
+BACKENDS = frozenset({PYDANTIC, SLOTS})
+
+# the backend of objects built from responses of the API,
+# selected once at import time
+MODEL_BACKEND = os.getenv("OYABUN_MODEL_BACKEND") or PYDANTIC
+
+assert MODEL_BACKEND in BACKENDS, f"unknown model backend {MODEL_BACKEND!r}"
+
+
+SlotsT = TypeVar("SlotsT", bound="SlotsType")
+
+
+class SlotsTypeInfo(NamedTuple):
+    """
+    Fields of the slots type compiled from its model.
+    """
+
+    aliases: dict[str, str]
+    by_alias: dict[str, str]
+    decoders: dict[str, DecoderT]
+    defaults: dict[str, Callable[[], Any]]
+    required: frozenset[str]
+
+
+class SlotsType:
+    """
+    A lightweight equivalent of a Telegram type:
+    a plain object with `__slots__` instead of a pydantic model.
+
+    It has the same fields, aliases and methods as the model,
+    and it is exported the same way: by alias, without unset
+    and None values. Objects take less memory and are built
+    several times faster, but values are never validated,
+    so only trusted data must be used, e.g. the one from Telegram.
+
+    Use `get_slots_type` to get the equivalent of the model.
+    """
+
+    __slots__ = ("__fields_set__",)
+
+    __fields_set__: set[str]
+    __model__: ClassVar[Type[TelegramBotApiType]]
+    __slots_info__: ClassVar[None | SlotsTypeInfo] = None
+
+    def __init__(self, **values: Any):
+        """
+        :param values: values of fields by name or alias
+        """
+
+        info = self._get_info()
+        fields_set = set()
+
+        for key, value in values.items():
+            name = info.by_alias.get(key, key)
+            if name not in info.aliases:
+                raise TypeError(
+                    f"{type(self).__name__}() got an unexpected field {key!r}"
+                )
+
+            object.__setattr__(self, name, value)
+            fields_set.add(name)
+
+        if missing := info.required - fields_set:
+            raise TypeError(
+                f"{type(self).__name__}() missing fields {sorted(missing)}"
+            )
+
+        object.__setattr__(self, "__fields_set__", fields_set)
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, (BaseModel, SlotsType)):
+            return NotImplemented
+
+        return self.dict() == other.dict()
+
+    def __getattr__(self, name: str) -> Any:
+        # called only for empty slots: defaults are set on access
+        get_default = self._get_info().defaults.get(name)
+        if get_default is None:
+            raise AttributeError(
+                f"{type(self).__name__!r} object has no attribute {name!r}"
+            )
+
+        value = get_default()
+        object.__setattr__(self, name, value)
+
+        return value
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        # the type is built at runtime, so it is restored by the model
+        values = {
+            _name: getattr(self, _name) for _name in self._get_info().aliases
+        }
+
+        return _restore, (self.__model__, values, self.__fields_set__)
+
+    def __repr__(self) -> str:
+        values = ", ".join(
+            f"{_name}={getattr(self, _name)!r}"
+            for _name in self._get_info().aliases
+        )
+
+        return f"{type(self).__name__}({values})"
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        object.__setattr__(self, name, value)
+        self.__fields_set__.add(name)
+
+    @classmethod
+    def decode(cls: Type["SlotsT"], data: dict[str, Any]) -> "SlotsT":
+        """
+        Builds the object from trusted data, e.g. the one from Telegram.
+
+        Nested objects are built as slots types, timestamps are parsed.
+        Unknown keys are ignored, missing fields take defaults on access.
+        """
+
+        info = cls._get_info()
+        obj = cls.__new__(cls)
+        fields_set = set()
+
+        for key, value in data.items():
+            name = info.by_alias.get(key)
+            if name is None:
+                continue
+
+            if value is not None and (decoder := info.decoders.get(name)):
+                value = decoder(value)
+
+            object.__setattr__(obj, name, value)
+            fields_set.add(name)
+
+        object.__setattr__(obj, "__fields_set__", fields_set)
+
+        return obj
+
+    def dict(  # noqa: A003, VNE003
+        self,
+        *,
+        exclude: AbstractSet[str] = frozenset(),
+    ) -> dict[str, Any]:
+        """
+        :param exclude: names of fields to leave out
+        """
+
+        return {
+            alias: _export(value)
+            for name, alias in self._get_info().aliases.items()
+            if name in self.__fields_set__
+            and name not in exclude  # noqa: W503
+            and (value := getattr(self, name)) is not None  # noqa: W503
+        }
+
+    def json(self) -> str:  # noqa: A003, VNE003
+        return self.jsonb().decode()
+
+    def jsonb(self) -> bytes:  # noqa: A003, VNE003
+        return orjson.dumps(self.dict(), default=pydantic_encoder)
+
+    @classmethod
+    def _get_info(cls) -> SlotsTypeInfo:
+        # compiled on the first use: forward refs are resolved by then
+        info = cls.__slots_info__
+        if info is None:
+            info = cls.__slots_info__ = _compile_info(cls.__model__)
+
+        return info
+
+
+_slots_types: dict[type, Type[SlotsType]] = {}
+
+
+def get_slots_type(cls: Type[TelegramBotApiType]) -> Type[SlotsType]:
+    """
+    Provides the slots type equivalent to the model.
+
+    The equivalent is not a subclass of the model,
+    but it has the same interface for reading and exporting:
+    check objects by their fields rather than with `isinstance`.
+    """
+
+    slots_cls = _slots_types.get(cls)
+    if slots_cls is None:
+        slots_cls = _slots_types[cls] = _build_slots_type(cls)
+
+    return slots_cls
+
+
+def _build_slots_type(cls: Type[TelegramBotApiType]) -> Type[SlotsType]:
+    namespace: dict[str, Any] = {
+        "__doc__": cls.__doc__,
+        "__model__": cls,
+        "__module__": cls.__module__,
+        "__qualname__": cls.__name__,
+        "__slots__": tuple(cls.__fields__),
+    }
+
+    # public methods and properties of the model and its bases
+    for klass in reversed(cls.__mro__):
+        if not issubclass(klass, TelegramBotApiType):
+            continue
+
+        if klass.__module__ == TelegramBotApiType.__module__:
+            continue
+
+        namespace.update(
+            (_name, _attr)
+            for _name, _attr in vars(klass).items()
+            if not _name.startswith("_")
+            and isinstance(_attr, (FunctionType, property))  # noqa: W503
+        )
+
+    return type(cls.__name__, (SlotsType,), namespace)
+
+
+def _compile_info(cls: Type[BaseModel]) -> SlotsTypeInfo:
+    decoders = {}
+
+    for name, field in cls.__fields__.items():
+        decoder = _compile_field_decoder(field, get_type=get_slots_type)
+        if decoder is not None:
+            decoders[name] = decoder
+
+    return SlotsTypeInfo(
+        aliases={
+            _name: _field.alias for _name, _field in cls.__fields__.items()
+        },
+        by_alias={
+            _field.alias: _name for _name, _field in cls.__fields__.items()
+        },
+        decoders=decoders,
+        defaults={
+            _name: _field.get_default
+            for _name, _field in cls.__fields__.items()
+            if not _field.required
+        },
+        required=frozenset(
+            _name
+            for _name, _field in cls.__fields__.items()
+            if _field.required
+        ),
+    )
+
+
+def _restore(
+    model: Type[TelegramBotApiType],
+    values: dict[str, Any],
+    fields_set: set[str],
+) -> SlotsType:
+    cls = get_slots_type(model)
+    obj = cls.__new__(cls)
+
+    for name, value in values.items():
+        object.__setattr__(obj, name, value)
+
+    object.__setattr__(obj, "__fields_set__", fields_set)
+
+    return obj
+
+
+def _export(value: Any) -> Any:
+    if isinstance(value, (BaseModel, SlotsType)):
+        return value.dict()
+
+    if isinstance(value, list):
+        return [_export(_v) for _v in value]
+
+    return value
+
+
+__all__ = (
+    "BACKENDS",
+    "get_slots_type",
+    "MODEL_BACKEND",
+    "PYDANTIC",
+    "SLOTS",
+    "SlotsType",
+    "SlotsTypeInfo",
+)
@@ -0,0 +1,113 @@
+import asyncio
+import hmac
+from typing import AsyncIterator
+
+import orjson
+from aiohttp import web
+from pydantic import ValidationError
+
+from oyabun.telegram import Update
+
+
+class Webhook:
+    """
+    The receiver of updates pushed by Telegram via webhook.
+
+    Each incoming update is parsed, put into a bounded queue
+    and acknowledged immediately, without waiting for handlers.
+
+    When the queue is full, the update is rejected
+    with 503 Service Unavailable, so Telegram delivers it later.
+
+    Usage:
+
+        webhook = Webhook(secret_token=secret)
+        runner = web.AppRunner(webhook.app)
+        ...
+        await bot.setWebhook(url=url, secret_token=secret)
+
+        async for update in webhook:
+            ...
+
+    https://core.telegram.org/bots/api#setwebhook
+    """
+
+    SECRET_TOKEN_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+    def __init__(
+        self,
+        *,
+        max_updates: int = 1000,
+        path: str = "/",
+        secret_token: None | str = None,
+    ):
+        """
+        Sets up the new Webhook instance.
+
+        :param max_updates: how many received updates may wait for handlers
+
+        :param path: a URL path to receive updates on
+
+        :param secret_token: a secret token passed to `Bot.setWebhook`;
+        requests without it are rejected
+        """
+
+        self._secret_token = secret_token.encode() if secret_token else None
+        self._updates: asyncio.Queue[Update] = asyncio.Queue(
+            maxsize=max_updates
+        )
+
+        self.app = web.Application()
+        self.app.router.add_post(path, self.handle)
+
+    @property
+    def pending(self) -> int:
+        """
+        The number of received updates which wait for handlers.
+        """
+
+        return self._updates.qsize()
+
+    def __aiter__(self) -> AsyncIterator[Update]:
+        return self._iter_updates()
+
+    async def get(self) -> Update:
+        """
+        Waits for the next received update.
+        """
+
+        return await self._updates.get()
+
+    async def handle(self, request: web.Request) -> web.Response:
+        """
+        Handles the incoming webhook request.
+        """
+
+        if not self._is_authorized(request):
+            raise web.HTTPUnauthorized()
+
+        body = await request.read()
+
+        try:
+            update = Update.parse_obj(orjson.loads(body))
+        except (orjson.JSONDecodeError, ValidationError) as err:
+            raise web.HTTPBadRequest(text=str(err)) from err
+
+        try:
+            self._updates.put_nowait(update)
+        except asyncio.QueueFull as err:
+            raise web.HTTPServiceUnavailable() from err
+
+        return web.Response()
+
+    async def _iter_updates(self) -> AsyncIterator[Update]:
+        while True:
+            yield await self.get()
+
+    def _is_authorized(self, request: web.Request) -> bool:
+        if self._secret_token is None:
+            return True
+
+        secret_token = request.headers.get(self.SECRET_TOKEN_HEADER, "")
+
+        return hmac.compare_digest(secret_token.encode(), self._secret_token)
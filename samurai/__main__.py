@@ -1,12 +1,18 @@
 import asyncio
 import os
+from typing import Any
 
 from devtools import debug
 from dotenv import load_dotenv
 
 from oyabun.bot import Bot
+from oyabun.polling import LongPolling
+from oyabun.telegram import Update
+from samurai.dispatcher import Dispatcher
 from samurai.fsm import actions
 from samurai.fsm.machine import FSM
+from samurai.imaging import ImageProcessor
+from samurai.persistence import JsonStorage
 from samurai.persistence import Persistence
 from samurai.states import State
 
@@ -15,6 +21,16 @@ load_dotenv()
 token = os.getenv("TELEGRAM_BOT_TOKEN") or ""
 assert token, "cannot start: TELEGRAM_BOT_TOKEN is not set"
 
+workers = int(os.getenv("SAMURAI_WORKERS") or 16)
+
+image_workers = int(os.getenv("SAMURAI_IMAGE_WORKERS") or 0) or None
+
+storage = (
+    JsonStorage(Persistence.LEGACY_DB_FILE)
+    if os.getenv("SAMURAI_STORAGE") == "json"
+    else None
+)
+
 graph = (
     (
         State.NOT_STARTED,
@@ -50,39 +66,65 @@ graph = (
 
 
 async def main() -> None:
-    bot = Bot(token)
-    db = Persistence()
+    bot = Bot(token, trust_responses=True)
+    db = Persistence(storage)
+
+    image_processor = ImageProcessor(max_workers=image_workers)
+
+    # dependencies of actions besides the bot
+    deps: dict[type, dict[str, Any]] = {
+        actions.ReplyWithProcessedPhoto: {"image_processor": image_processor},
+    }
+
     fsm = FSM(db, bot)
 
     for state0, state1, action_cls in graph:
         # TODO: un-ignore when this is resolved:  # noqa: T101
         # https://github.com/python/mypy/issues/5374
-        fsm.register(state0, state1, action_cls)  # type: ignore
-
-    async with bot.client_session():
-        while True:
-            print("\n", "-" * 30, "cycle", "-" * 30)  # noqa: T201
-
-            offset = await db.load_updates_offset()
-            debug(offset)
-
-            updates = await bot.getUpdates(offset=offset, timeout=30)
-            if not updates:
-                continue
-
-            for update in updates:
-                user = update.get_user()
-
-                _state = await db.load_state(user.id)
-                state = State(_state) if _state else State.NOT_STARTED
-
-                next_state = await fsm.transit(state, update)
-                await db.store_state(user.id, next_state.value)
-
-                offset = max(offset, update.update_id) + 1
-                await db.store_updates_offset(offset)
-
-            await asyncio.sleep(4)
+        fsm.register(  # type: ignore
+            state0,
+            state1,
+            action_cls,
+            deps=deps.get(action_cls, {}),
+        )
+
+    async def handle(update: Update) -> None:
+        user = update.get_user()
+
+        _state = await db.load_state(user.id)
+        state = State(_state) if _state else State.NOT_STARTED
+
+        next_state = await fsm.transit(state, update)
+        db.stage_state(update.update_id, user.id, next_state.value)
+
+    offset = await db.load_updates_offset()
+    debug(offset)
+
+    # updates are acknowledged to Telegram only once they are handled
+    polling = LongPolling(bot, auto_commit=False, offset=offset, timeout=30)
+
+    async def commit(updates_offset: int) -> None:
+        # the states are written with the offset by the periodic flush
+        await db.commit(updates_offset)
+        polling.commit(updates_offset)
+
+    dispatcher = Dispatcher(
+        handle,
+        offset=offset,
+        on_offset=commit,
+        workers=workers,
+    )
+
+    async with bot.client_session(), db, image_processor:
+        async with dispatcher, polling:
+            async for updates in polling.batches():
+                print("\n", "-" * 30, "batch", "-" * 30)  # noqa: T201
+
+                # the states of the batch are loaded at once
+                await db.load_states(_u.get_user().id for _u in updates)
+
+                for update in updates:
+                    await dispatcher.submit(update)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,212 @@
+import asyncio
+import heapq
+import logging
+from collections import deque
+from typing import Awaitable
+from typing import Callable
+from typing import Hashable
+
+from oyabun.telegram import Update
+
+logger = logging.getLogger(__name__)
+
+UpdateHandlerT = Callable[[Update], Awaitable[None]]
+
+UpdateKeyT = Callable[[Update], Hashable]
+
+OffsetHandlerT = Callable[[int], Awaitable[None]]
+
+
+def user_key(update: Update) -> Hashable:
+    return update.get_user().id
+
+
+class Dispatcher:
+    """
+    Runs update handlers concurrently on a bounded pool of workers.
+
+    Updates with the same key (a user by default) are handled
+    strictly in the order of submission, one at a time.
+    Updates with different keys are handled concurrently.
+
+    The `offset` only moves past a contiguous prefix
+    of finished updates: no update before it is still being handled.
+
+    An update is finished when its handler returns or fails.
+    A failed update is logged and dropped, it is never handled again,
+    so the handler must keep its own state consistent on errors.
+    """
+
+    def __init__(
+        self,
+        handler: UpdateHandlerT,
+        *,
+        key: UpdateKeyT = user_key,
+        max_pending: int = 1000,
+        offset: int = 0,
+        on_offset: None | OffsetHandlerT = None,
+        workers: int = 16,
+    ):
+        """
+        :param handler: a coroutine function to handle an update
+
+        :param key: a function of the update, the ordering key
+
+        :param max_pending: how many updates may be submitted
+        before they are handled
+
+        :param offset: the first update id to handle
+
+        :param on_offset: a coroutine function called with the offset
+        each time it moves, e.g. to commit the handled updates
+
+        :param workers: the number of concurrent handlers
+        """
+
+        assert workers > 0
+        assert max_pending > 0
+
+        self._handler = handler
+        self._key = key
+        self._max_pending = max_pending
+        self._nr_workers = workers
+        self._offset = offset
+        self._on_offset = on_offset
+
+        self._finished: set[int] = set()
+        self._nr_failed = 0
+        self._pending: list[int] = []
+        self._pending_ids: set[int] = set()
+        self._queues: dict[Hashable, deque[Update]] = {}
+        self._ready: asyncio.Queue[Hashable] = asyncio.Queue()
+        self._slots = asyncio.Condition()
+        self._workers: list[asyncio.Task] = []
+
+    @property
+    def offset(self) -> int:
+        """
+        The next update id to request:
+        all the updates before it are handled.
+        """
+
+        return self._offset
+
+    @property
+    def failed(self) -> int:
+        """
+        The number of updates dropped since their handler failed.
+        """
+
+        return self._nr_failed
+
+    @property
+    def pending(self) -> int:
+        """
+        The number of submitted updates which are not handled yet.
+        """
+
+        return len(self._pending)
+
+    async def __aenter__(self) -> "Dispatcher":
+        self.start()
+        return self
+
+    async def __aexit__(self, *_exc: object) -> None:
+        await self.stop()
+
+    def start(self) -> None:
+        if self._workers:
+            return
+
+        self._workers = [
+            asyncio.create_task(self._work(), name=f"dispatcher-{i}")
+            for i in range(self._nr_workers)
+        ]
+
+    async def stop(self) -> None:
+        """
+        Waits for all submitted updates to be handled
+        and stops the workers.
+        """
+
+        await self.join()
+
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def join(self) -> None:
+        async with self._slots:
+            await self._slots.wait_for(lambda: not self._pending)
+
+    async def submit(self, update: Update) -> None:
+        """
+        Schedules the update for handling.
+
+        Waits while there are too many pending updates (backpressure).
+        Updates which are behind the offset or already pending are ignored.
+        """
+
+        update_id = update.update_id
+        if update_id < self._offset or update_id in self._pending_ids:
+            return
+
+        async with self._slots:
+            await self._slots.wait_for(
+                lambda: len(self._pending) < self._max_pending
+            )
+
+        heapq.heappush(self._pending, update_id)
+        self._pending_ids.add(update_id)
+
+        key = self._key(update)
+        queue = self._queues.get(key)
+        if queue is not None:
+            # the key is already owned by a worker
+            # which will take this update after the current one
+            queue.append(update)
+            return
+
+        self._queues[key] = deque((update,))
+        self._ready.put_nowait(key)
+
+    async def _work(self) -> None:
+        while True:
+            key = await self._ready.get()
+            queue = self._queues[key]
+
+            while queue:
+                update = queue[0]
+                try:
+                    await self._handler(update)
+                except Exception:  # noqa: B902
+                    self._nr_failed += 1
+                    logger.exception(
+                        "update %s is dropped: the handler failed",
+                        update.update_id,
+                    )
+                finally:
+                    queue.popleft()
+                    await self._finish(update.update_id)
+
+            del self._queues[key]
+
+    async def _finish(self, update_id: int) -> None:
+        self._finished.add(update_id)
+        offset = self._offset
+
+        while self._pending and self._pending[0] in self._finished:
+            done = heapq.heappop(self._pending)
+            self._finished.discard(done)
+            self._pending_ids.discard(done)
+            self._offset = max(self._offset, done + 1)
+
+        if self._on_offset is not None and self._offset != offset:
+            try:
+                await self._on_offset(self._offset)
+            except Exception:  # noqa: B902
+                logger.exception("offset %s is not handled", self._offset)
+
+        async with self._slots:
+            self._slots.notify_all()
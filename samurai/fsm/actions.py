@@ -1,49 +1,67 @@
 import abc
 import asyncio
+from typing import ClassVar
 
 from devtools import debug
-from PIL import Image
 
 from oyabun.bot import Bot
 from oyabun.telegram import InlineKeyboardButton
 from oyabun.telegram import InlineKeyboardMarkup
+from oyabun.telegram import InputFile
 from oyabun.telegram import Update
 from samurai.dirs import DIR_DOCS_IMG
-from samurai.dirs import DIR_TMP
+from samurai.fsm.routing import Filter
+from samurai.fsm.routing import UPDATE_KINDS
+from samurai.imaging import ImageProcessor
 from samurai.util import json_dumps
 
+# keyboards are built once: their JSON is cached and reused by requests
+TEST_BUTTON_KEYBOARD = InlineKeyboardMarkup(
+    inline_keyboard=[
+        [
+            InlineKeyboardButton(
+                callback_data="lenna.png",
+                text="Press to test inline button",
+            ),
+        ],
+    ],
+)
+
+NO_BUTTONS_KEYBOARD = InlineKeyboardMarkup(
+    inline_keyboard=[
+        [],
+    ],
+)
+
 
 class AbstractAction(abc.ABC):
+    # updates the action reacts on: compiled into routes by FSM
+    filters: ClassVar[tuple[Filter, ...]] = ()
+
     def __init__(self, bot: Bot):
         self._bot = bot
 
-    class NoReaction(RuntimeError):
-        pass
-
     class ReactionFailed(RuntimeError):
         pass
 
     async def react(self, update: Update) -> None:
-        await self._ensure_reaction_on(update)
         try:
             await self._react(update)
         except Exception as err:
             raise self.ReactionFailed(err) from err
 
-    @abc.abstractmethod
-    async def _ensure_reaction_on(self, update: Update) -> None:
-        raise NotImplementedError
-
     @abc.abstractmethod
     async def _react(self, update: Update) -> None:
         raise NotImplementedError
 
 
 class Start(AbstractAction):
-    async def _ensure_reaction_on(self, update: Update) -> None:
-        keywords = {"/start", "restart"}
-        if not update.message or update.message.text not in keywords:
-            raise self.NoReaction
+    filters = (
+        Filter(
+            kind="message",
+            commands=frozenset({"/start", "restart"}),
+        ),
+    )
 
     async def _react(self, update: Update) -> None:
         assert update.message
@@ -79,9 +97,12 @@ class Start(AbstractAction):
 
 
 class RespondToPlainText(AbstractAction):
-    async def _ensure_reaction_on(self, update: Update) -> None:
-        if not update.message or not update.message.text:
-            raise self.NoReaction
+    filters = (
+        Filter(
+            kind="message",
+            content_types=frozenset({"text"}),
+        ),
+    )
 
     async def _react(self, update: Update) -> None:
         message = update.message
@@ -107,9 +128,12 @@ class RespondToPlainText(AbstractAction):
 
 
 class RespondToEditingText(AbstractAction):
-    async def _ensure_reaction_on(self, update: Update) -> None:
-        if not update.edited_message or not update.edited_message.text:
-            raise self.NoReaction
+    filters = (
+        Filter(
+            kind="edited_message",
+            content_types=frozenset({"text"}),
+        ),
+    )
 
     async def _react(self, update: Update) -> None:
         message = update.edited_message
@@ -119,27 +143,18 @@ class RespondToEditingText(AbstractAction):
             chat_id=message.chat.id,
             reply_to_message_id=message.message_id,
             text=f"Your new message: {message.text!r}.",
-            reply_markup=InlineKeyboardMarkup(
-                inline_keyboard=[
-                    [
-                        InlineKeyboardButton(
-                            callback_data="lenna.png",
-                            text="Press to test inline button",
-                        ),
-                    ],
-                ],
-            ),
+            reply_markup=TEST_BUTTON_KEYBOARD,
         )
 
 
 class SendPhoto(AbstractAction):
-    async def _ensure_reaction_on(self, update: Update) -> None:
-        if (
-            not update.callback_query
-            or not update.callback_query.message  # noqa: W503
-            or not update.callback_query.data  # noqa: W503
-        ):
-            raise self.NoReaction
+    filters = (
+        Filter(
+            kind="callback_query",
+            callback_data_prefixes=("",),
+            with_message=True,
+        ),
+    )
 
     async def _react(self, update: Update) -> None:
         assert update.callback_query and update.callback_query.data
@@ -165,11 +180,7 @@ class SendPhoto(AbstractAction):
         await self._bot.editMessageReplyMarkup(
             chat_id=message.chat.id,
             message_id=message.message_id,
-            reply_markup=InlineKeyboardMarkup(
-                inline_keyboard=[
-                    [],
-                ],
-            ),
+            reply_markup=NO_BUTTONS_KEYBOARD,
         )
 
         await self._bot.deleteMessage(
@@ -179,9 +190,16 @@ class SendPhoto(AbstractAction):
 
 
 class ReplyWithProcessedPhoto(AbstractAction):
-    async def _ensure_reaction_on(self, update: Update) -> None:
-        if not update.message or not update.message.photo:
-            raise self.NoReaction
+    filters = (
+        Filter(
+            kind="message",
+            content_types=frozenset({"photo"}),
+        ),
+    )
+
+    def __init__(self, bot: Bot, *, image_processor: ImageProcessor):
+        super().__init__(bot)
+        self._image_processor = image_processor
 
     async def _react(self, update: Update) -> None:
         message = update.message
@@ -196,16 +214,15 @@ class ReplyWithProcessedPhoto(AbstractAction):
         assert file_obj.file_path, f"no file_path in: {file_obj}"
 
         buffer = await self._bot.downloadFile(file=file_obj)
-        image = Image.open(buffer).convert(mode="L").convert(mode="RGB")
+
+        debug(self._image_processor.queue_depth)
+        processed = await self._image_processor.to_noir(buffer.getvalue())
 
         file_name = f"{file_obj.file_unique_id}{file_obj.file_path[-4:]}"
-        file_path = (DIR_TMP / file_name).resolve()
-        with file_path.open("wb") as stream:
-            image.save(stream)
 
         sent = await self._bot.sendPhoto(
             chat_id=message.chat.id,
-            photo=file_path,
+            photo=InputFile(processed, filename=file_name),
         )
 
         await self._bot.editMessageCaption(
@@ -221,8 +238,8 @@ class ReplyWithProcessedPhoto(AbstractAction):
 
 
 class Restart(AbstractAction):
-    async def _ensure_reaction_on(self, update: Update) -> None:
-        assert update
+    # any update: the ones without a message are answered with an error
+    filters = tuple(Filter(kind=_kind) for _kind in UPDATE_KINDS)
 
     async def _react(self, update: Update) -> None:
         message = update.message
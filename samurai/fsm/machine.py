@@ -1,15 +1,20 @@
 import traceback
+from types import MappingProxyType
 from typing import Any
+from typing import Mapping
 from typing import Type
 from typing import TypeVar
 
 from oyabun.bot import Bot
 from oyabun.telegram import Update
 from samurai.fsm.actions import AbstractAction
+from samurai.fsm.routing import Router
 from samurai.persistence import Persistence
 
 StateT = TypeVar("StateT")
 
+TransitionT = tuple[Any, AbstractAction]
+
 
 class FSM:
     def __init__(self, db: Persistence, bot: Bot):
@@ -17,34 +22,46 @@ class FSM:
         self._db: Persistence = db
         self._stt: dict[tuple[Any, Any], AbstractAction] = {}
 
+        # state0 -> routes to (state1, action) by the action filters
+        self._routers: dict[Any, Router[TransitionT]] = {}
+
     def register(
         self,
         state0: StateT,
         state1: StateT,
         action_cls: Type[AbstractAction],
+        *,
+        deps: Mapping[str, Any] = MappingProxyType({}),
     ) -> "FSM":
+        """
+        :param deps: dependencies of the action
+        passed to its constructor by name, e.g. an image processor
+        """
+
         key = (state0, state1)
         if key not in self._stt:
-            action = action_cls(self._bot)
+            action = action_cls(self._bot, **deps)
             self._stt[key] = action
+
+            router = self._routers.setdefault(state0, Router())
+            router.add(action.filters, (state1, action))
+
         return self
 
     async def transit(self, state: StateT, update: Update) -> StateT:
-        chat = update.get_chat()
-
         next_state = state
 
-        for (state0, state1), action in self._stt.items():
-            if state0 != state:
-                continue
+        router = self._routers.get(state)
+        if router is None:
+            return next_state
 
+        for state1, action in router.route(update):
             try:
                 await action.react(update)
-            except AbstractAction.NoReaction:
-                continue
             except AbstractAction.ReactionFailed as err:
                 traceback.print_exc()
 
+                chat = update.get_chat()
                 await self._bot.sendMessage(
                     chat_id=chat.id,
                     text=f"ERROR: {err}",
@@ -0,0 +1,206 @@
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Any
+from typing import Generic
+from typing import Iterable
+from typing import TypeVar
+
+from oyabun.telegram import Message
+from oyabun.telegram import Update
+
+UPDATE_KINDS = (
+    "message",
+    "edited_message",
+    "callback_query",
+)
+
+# kinds of updates which carry a message
+MESSAGE_KINDS = (
+    "message",
+    "edited_message",
+)
+
+CONTENT_TYPES = (
+    "audio",
+    "dice",
+    "document",
+    "photo",
+    "sticker",
+    "text",
+    "video",
+    "video_note",
+    "voice",
+)
+
+TargetT = TypeVar("TargetT")
+
+
+def get_update_kind(update: Update) -> None | str:
+    """
+    Returns the name of the update field which is set.
+    """
+
+    for kind in UPDATE_KINDS:
+        if getattr(update, kind) is not None:
+            return kind
+
+    return None
+
+
+def get_content_types(message: Message) -> set[str]:
+    return {_ct for _ct in CONTENT_TYPES if getattr(message, _ct)}
+
+
+@dataclass(frozen=True)
+class Filter:
+    """
+    Describes updates an action reacts on.
+
+    All the given conditions must be met:
+
+    - kind: the kind of update (see `UPDATE_KINDS`);
+    - commands: exact texts of the message;
+    - callback_data_prefixes: prefixes of the callback query data,
+      an empty prefix matches any data;
+    - content_types: the message must contain any of them
+      (see `CONTENT_TYPES`);
+    - with_message: the callback query must come with its message,
+      which is missing for too old or inline messages.
+    """
+
+    kind: str
+    callback_data_prefixes: tuple[str, ...] = ()
+    commands: frozenset[str] = frozenset()
+    content_types: frozenset[str] = frozenset()
+    with_message: bool = False
+
+    def __post_init__(self) -> None:
+        assert self.kind in UPDATE_KINDS, f"unknown kind {self.kind!r}"
+
+        assert (
+            not self.with_message or self.kind == "callback_query"
+        ), "with_message is for callback queries only"
+
+        unknown = self.content_types - set(CONTENT_TYPES)
+        assert not unknown, f"unknown content types {unknown}"
+
+    def matches(self, update: Update) -> bool:
+        obj = getattr(update, self.kind)
+        if obj is None:
+            return False
+
+        if self.callback_data_prefixes:
+            data = getattr(obj, "data", None)
+            if data is None or not data.startswith(
+                self.callback_data_prefixes
+            ):
+                return False
+
+        if self.commands and getattr(obj, "text", None) not in self.commands:
+            return False
+
+        if self.with_message and getattr(obj, "message", None) is None:
+            return False
+
+        if self.content_types and not (
+            self.kind in MESSAGE_KINDS
+            and self.content_types & get_content_types(obj)  # noqa: W503
+        ):
+            return False
+
+        return True
+
+
+@dataclass
+class _Routes(Generic[TargetT]):
+    """
+    Routes of a single update kind.
+
+    Targets are stored along with their registration order.
+    """
+
+    any_update: list[tuple[int, Filter, TargetT]] = field(default_factory=list)
+    by_command: dict[str, list[tuple[int, Filter, TargetT]]] = field(
+        default_factory=dict
+    )
+    by_content_type: dict[str, list[tuple[int, Filter, TargetT]]] = field(
+        default_factory=dict
+    )
+    by_prefix: list[tuple[str, int, Filter, TargetT]] = field(
+        default_factory=list
+    )
+
+
+class Router(Generic[TargetT]):
+    """
+    Compiles filters into a routing table.
+
+    The most selective condition of each filter is used as a key:
+    a command or a content type is looked up in a dict,
+    only prefixes of the callback data are scanned.
+    Targets which do not match the update are never touched.
+    """
+
+    def __init__(self) -> None:
+        self._counter = 0
+        self._routes: dict[str, _Routes[TargetT]] = {}
+
+    def add(self, filters: Iterable[Filter], target: TargetT) -> None:
+        order = self._counter
+        self._counter += 1
+
+        for flt in filters:
+            routes = self._routes.setdefault(flt.kind, _Routes())
+            entry = (order, flt, target)
+
+            if flt.commands:
+                for command in flt.commands:
+                    routes.by_command.setdefault(command, []).append(entry)
+            elif flt.callback_data_prefixes:
+                for prefix in flt.callback_data_prefixes:
+                    routes.by_prefix.append((prefix, *entry))
+            elif flt.content_types:
+                for ct in flt.content_types:
+                    routes.by_content_type.setdefault(ct, []).append(entry)
+            else:
+                routes.any_update.append(entry)
+
+    def route(self, update: Update) -> list[TargetT]:
+        """
+        Returns the targets matching the update, in registration order.
+        """
+
+        kind = get_update_kind(update)
+        routes = self._routes.get(kind) if kind else None
+        if routes is None:
+            return []
+
+        obj: Any = getattr(update, kind)  # type: ignore
+        found = list(routes.any_update)
+
+        if routes.by_command and (text := getattr(obj, "text", None)):
+            found.extend(routes.by_command.get(text, ()))
+
+        data = getattr(obj, "data", None)
+        if routes.by_prefix and data is not None:
+            found.extend(
+                (_order, _flt, _target)
+                for _prefix, _order, _flt, _target in routes.by_prefix
+                if data.startswith(_prefix)
+            )
+
+        if routes.by_content_type and kind in MESSAGE_KINDS:
+            for ct, entries in routes.by_content_type.items():
+                if getattr(obj, ct):
+                    found.extend(entries)
+
+        targets: list[TargetT] = []
+        seen: set[int] = set()
+
+        for _order, flt, target in sorted(found, key=lambda _e: _e[0]):
+            if id(target) in seen or not flt.matches(update):
+                continue
+            seen.add(id(target))
+            targets.append(target)
+
+        return targets
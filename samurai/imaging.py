@@ -0,0 +1,116 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from io import BytesIO
+from typing import Callable
+
+from PIL import Image
+
+
+def to_noir(data: bytes) -> bytes:
+    """
+    Converts the encoded image into grayscale keeping its format.
+
+    Runs in a worker process: takes and returns bytes only.
+    """
+
+    with Image.open(BytesIO(data)) as image:
+        image_format = image.format or "JPEG"
+        processed = image.convert(mode="L").convert(mode="RGB")
+
+    buffer = BytesIO()
+    processed.save(buffer, format=image_format)
+
+    return buffer.getvalue()
+
+
+class ImageProcessor:
+    """
+    Runs image processing in a pool of worker processes,
+    so the event loop is never blocked by decoding/encoding.
+
+    At most `max_pending` images are processed or wait for a worker;
+    the others wait for a free slot in the event loop.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_pending: int = 32,
+        max_workers: None | int = None,
+    ):
+        """
+        :param max_pending: how many images may be submitted to the pool
+
+        :param max_workers: the number of worker processes,
+        CPU count by default
+        """
+
+        self.max_pending = max_pending
+        self.max_workers = max_workers
+
+        self.__executor: None | ProcessPoolExecutor = None
+        self.__nr_submitted = 0
+        self.__nr_waiting = 0
+        self.__slots = asyncio.Semaphore(max_pending)
+
+    @property
+    def queue_depth(self) -> int:
+        """
+        The number of images which are not processed yet,
+        including those waiting for a free slot.
+        """
+
+        return self.__nr_submitted + self.__nr_waiting
+
+    async def __aenter__(self) -> "ImageProcessor":
+        return self
+
+    async def __aexit__(self, *_exc: object) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """
+        Shuts the pool down without blocking the event loop:
+        worker processes are joined in a thread.
+        """
+
+        executor, self.__executor = self.__executor, None
+        if executor is None:
+            return
+
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(
+            None,
+            partial(executor.shutdown, cancel_futures=True),
+        )
+
+    async def to_noir(self, data: bytes) -> bytes:
+        return await self._run(to_noir, data)
+
+    def shutdown(self) -> None:
+        if self.__executor is not None:
+            self.__executor.shutdown(cancel_futures=True)
+            self.__executor = None
+
+    async def _run(self, func: Callable[[bytes], bytes], data: bytes) -> bytes:
+        self.__nr_waiting += 1
+        try:
+            await self.__slots.acquire()
+        finally:
+            self.__nr_waiting -= 1
+
+        self.__nr_submitted += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, data)
+        finally:
+            self.__nr_submitted -= 1
+            self.__slots.release()
+
+    @property
+    def _executor(self) -> ProcessPoolExecutor:
+        if self.__executor is None:
+            self.__executor = ProcessPoolExecutor(max_workers=self.max_workers)
+
+        return self.__executor
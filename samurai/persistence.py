@@ -1,69 +1,609 @@
+import abc
 import asyncio
+import os
+import sqlite3
+import traceback
 from concurrent.futures import ThreadPoolExecutor
-from os import cpu_count
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any
+from typing import AsyncContextManager
+from typing import AsyncGenerator
+from typing import Callable
+from typing import Collection
+from typing import Iterable
+from typing import Mapping
+from typing import TypeVar
 
 import orjson
 
 from samurai.dirs import DIR_ARTIFACTS
 
+_T = TypeVar("_T")
 
-class Persistence:
-    DB_FILE = DIR_ARTIFACTS / "samurai.json"
 
-    async def load_state(self, user_id: str | int) -> str:
-        db = await self._load_db()
-        state: str = db.get("user_states", {}).get(str(user_id))
-        return state
+class Storage(abc.ABC):
+    """
+    A backend which actually keeps the user states and the updates offset.
+    """
 
-    async def store_state(self, user_id: str | int, state: str) -> None:
+    @abc.abstractmethod
+    async def load_state(self, user_id: str) -> None | str:
+        raise NotImplementedError
+
+    async def load_states(
+        self,
+        user_ids: Collection[str],
+    ) -> dict[str, None | str]:
+        """
+        Loads the states of all the given users at once.
+        """
+
+        return {_id: await self.load_state(_id) for _id in user_ids}
+
+    @abc.abstractmethod
+    async def load_updates_offset(self) -> int:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def store(
+        self,
+        *,
+        states: Mapping[str, str],
+        updates_offset: None | int = None,
+    ) -> None:
+        """
+        Stores all the given states and the offset at once.
+        """
+
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+class JsonStorage(Storage):
+    """
+    Keeps everything in a single JSON file.
+
+    The file is read once: this process is its only writer.
+    Every write replaces the whole file atomically.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+
+        self.__db: None | dict = None
+
+        self.__executor = ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix=self.__class__.__name__,
+        )
+
+        # read-modify-write cycles must not interleave
+        self.__lock = asyncio.Lock()
+
+    async def load_state(self, user_id: str) -> None | str:
         db = await self._load_db()
-        db.setdefault("user_states", {})[str(user_id)] = state
-        await self._store_db(db)
+        state: None | str = db.get("user_states", {}).get(user_id)
+        return state
 
     async def load_updates_offset(self) -> int:
         db = await self._load_db()
         value = db.get("updates_offset") or 0
         return int(value)
 
-    async def store_updates_offset(self, updates_offset: int) -> None:
-        db = await self._load_db()
-        db["updates_offset"] = updates_offset
-        await self._store_db(db)
+    async def store(
+        self,
+        *,
+        states: Mapping[str, str],
+        updates_offset: None | int = None,
+    ) -> None:
+        async with self.__lock:
+            db = await self._load_db()
+            db.setdefault("user_states", {}).update(states)
+            if updates_offset is not None:
+                db["updates_offset"] = updates_offset
+            await self._store_db(db)
+
+    async def close(self) -> None:
+        self.__executor.shutdown()
+
+    async def _load_db(self) -> dict:
+        if self.__db is None:
+            loop = asyncio.get_running_loop()
+            self.__db = await loop.run_in_executor(self.__executor, self.read)
+
+        return self.__db
+
+    async def _store_db(self, db: dict) -> None:
+        options = (
+            orjson.OPT_INDENT_2
+            | orjson.OPT_SORT_KEYS  # noqa: W503
+            | orjson.OPT_APPEND_NEWLINE  # noqa: W503
+        )
+        content = orjson.dumps(db, option=options)
+
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.__executor, self.write, content)
+
+    def read(self) -> dict:
+        """
+        Reads the whole file synchronously.
+        """
+
+        if not self.path.is_file():
+            return {}
 
-    def __init__(self) -> None:
-        nr_cpus = cpu_count()
-        assert nr_cpus
+        with self.path.open("r") as stream:
+            try:
+                db = orjson.loads(stream.read())
+                assert isinstance(db, dict)
+                return db
+            except orjson.JSONDecodeError:
+                return {}
+
+    def write(self, content: bytes) -> None:
+        """
+        Replaces the whole file synchronously.
+
+        The content goes to a temporary file first,
+        which then is renamed over the target one:
+        the file is never seen partially written, even after a crash.
+        """
+
+        tmp = self.path.with_name(f".{self.path.name}.tmp")
+
+        with tmp.open("wb") as stream:
+            stream.write(content)
+            stream.flush()
+            os.fsync(stream.fileno())
+
+        os.replace(tmp, self.path)
+
+        dir_fd = os.open(self.path.parent, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+class SqliteStorage(Storage):
+    """
+    Keeps the user states in an SQLite database in WAL mode,
+    one row per user.
 
+    The database is created on first use.
+    If the legacy JSON file exists at that moment,
+    its content is migrated into the new database
+    in the same transaction.
+    """
+
+    # kept in `PRAGMA user_version`: 0 for a new or unfinished database
+    SCHEMA_VERSION = 1
+
+    def __init__(self, path: Path, *, legacy: None | Path = None) -> None:
+        self.legacy = legacy
+        self.path = path
+
+        self.__db: None | sqlite3.Connection = None
+
+        # sqlite3 connection must not be shared between threads
         self.__executor = ThreadPoolExecutor(
-            max_workers=nr_cpus * 2 + 1,
+            max_workers=1,
             thread_name_prefix=self.__class__.__name__,
         )
 
-    async def _load_db(self) -> dict:
-        def _do() -> dict:
-            if not self.DB_FILE.is_file():
-                return {}
+    async def load_state(self, user_id: str) -> None | str:
+        def _do(db: sqlite3.Connection) -> None | str:
+            row = db.execute(
+                "SELECT state FROM user_states WHERE user_id = ?;",
+                (user_id,),
+            ).fetchone()
+            return row[0] if row else None
+
+        return await self._run(_do)
+
+    async def load_states(
+        self,
+        user_ids: Collection[str],
+    ) -> dict[str, None | str]:
+        def _do(db: sqlite3.Connection) -> dict[str, None | str]:
+            states: dict[str, None | str] = dict.fromkeys(user_ids)
+            ids = list(states)
+            # keep below the default limit of host parameters
+            for i in range(0, len(ids), 500):
+                chunk = ids[i : i + 500]  # noqa: E203
+                marks = ", ".join("?" * len(chunk))
+                rows = db.execute(
+                    "SELECT user_id, state FROM user_states"
+                    f" WHERE user_id IN ({marks});",  # noqa: S608
+                    chunk,
+                )
+                states.update(rows)
+            return states
+
+        return await self._run(_do)
 
-            with self.DB_FILE.open("r") as stream:
-                try:
-                    db = orjson.loads(stream.read())
-                    assert isinstance(db, dict)
-                    return db
-                except orjson.JSONDecodeError:
-                    return {}
+    async def load_updates_offset(self) -> int:
+        def _do(db: sqlite3.Connection) -> int:
+            row = db.execute(
+                "SELECT value FROM meta WHERE key = 'updates_offset';"
+            ).fetchone()
+            return int(row[0]) if row else 0
+
+        return await self._run(_do)
+
+    async def store(
+        self,
+        *,
+        states: Mapping[str, str],
+        updates_offset: None | int = None,
+    ) -> None:
+        def _do(db: sqlite3.Connection) -> None:
+            with db:
+                self._upsert(db, states, updates_offset)
+
+        await self._run(_do)
+
+    async def close(self) -> None:
+        def _do() -> None:
+            if self.__db is not None:
+                self.__db.close()
+                self.__db = None
 
         loop = asyncio.get_running_loop()
-        return await loop.run_in_executor(self.__executor, _do)
+        await loop.run_in_executor(self.__executor, _do)
+        self.__executor.shutdown()
 
-    async def _store_db(self, db: dict) -> None:
-        def _sync() -> None:
-            options = (
-                orjson.OPT_INDENT_2
-                | orjson.OPT_SORT_KEYS  # noqa: W503
-                | orjson.OPT_APPEND_NEWLINE  # noqa: W503
+    async def _run(self, func: Callable[[sqlite3.Connection], _T]) -> _T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.__executor,
+            lambda: func(self._connect()),
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        if self.__db is not None:
+            return self.__db
+
+        db = sqlite3.connect(self.path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode = WAL;")
+        db.execute("PRAGMA synchronous = NORMAL;")
+
+        try:
+            self._create_schema(db)
+        except BaseException:
+            db.close()
+            raise
+
+        self.__db = db
+        return db
+
+    def _create_schema(self, db: sqlite3.Connection) -> None:
+        # the schema and the migrated data are committed at once
+        # with the schema version: a failed migration is rolled back
+        # and it is retried on the next connect
+        with db:
+            db.execute("BEGIN IMMEDIATE;")
+
+            (version,) = db.execute("PRAGMA user_version;").fetchone()
+            if version >= self.SCHEMA_VERSION:
+                return
+
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS user_states ("
+                " user_id TEXT PRIMARY KEY,"
+                " state TEXT NOT NULL"
+                ") WITHOUT ROWID;"
+            )
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS meta ("
+                " key TEXT PRIMARY KEY,"
+                " value"
+                ") WITHOUT ROWID;"
             )
-            with self.DB_FILE.open("wb") as stream:
-                stream.write(orjson.dumps(db, option=options))
+            if self.legacy:
+                self._migrate(db, self.legacy)
 
-        loop = asyncio.get_running_loop()
-        await loop.run_in_executor(self.__executor, _sync)
+            db.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION:d};")
+
+    @classmethod
+    def _migrate(cls, db: sqlite3.Connection, legacy: Path) -> None:
+        data = JsonStorage(legacy).read()
+        cls._upsert(
+            db,
+            data.get("user_states") or {},
+            data.get("updates_offset"),
+        )
+
+    @staticmethod
+    def _upsert(
+        db: sqlite3.Connection,
+        states: Mapping[str, Any],
+        updates_offset: None | int,
+    ) -> None:
+        db.executemany(
+            "INSERT INTO user_states (user_id, state) VALUES (?, ?)"
+            " ON CONFLICT (user_id) DO UPDATE SET state = excluded.state;",
+            states.items(),
+        )
+
+        if updates_offset is not None:
+            db.execute(
+                "INSERT INTO meta (key, value) VALUES ('updates_offset', ?)"
+                " ON CONFLICT (key) DO UPDATE SET value = excluded.value;",
+                (updates_offset,),
+            )
+
+
+class WriteBackCache(Storage):
+    """
+    Keeps the states in memory in front of another storage.
+
+    Reads hit the underlying storage only once per user.
+    Writes are coalesced in memory and stored all at once:
+    periodically, on explicit `flush` and on `close`.
+    """
+
+    def __init__(self, storage: Storage, *, interval: float = 1) -> None:
+        """
+        :param storage: an underlying storage
+
+        :param interval: seconds between periodic flushes
+        """
+
+        self.interval = interval
+        self.storage = storage
+
+        self.__batches = 0
+        self.__dirty_offset: None | int = None
+        self.__dirty_states: dict[str, str] = {}
+        self.__flusher: None | asyncio.Task = None
+        self.__lock = asyncio.Lock()
+        self.__offset: None | int = None
+        self.__states: dict[str, None | str] = {}
+
+    @property
+    def is_dirty(self) -> bool:
+        return bool(self.__dirty_states) or self.__dirty_offset is not None
+
+    async def load_state(self, user_id: str) -> None | str:
+        if user_id not in self.__states:
+            state = await self.storage.load_state(user_id)
+            # the state might be stored while it was being loaded
+            self.__states.setdefault(user_id, state)
+
+        return self.__states[user_id]
+
+    async def load_states(
+        self,
+        user_ids: Collection[str],
+    ) -> dict[str, None | str]:
+        missing = [_id for _id in user_ids if _id not in self.__states]
+        if missing:
+            states = await self.storage.load_states(missing)
+            for user_id, state in states.items():
+                self.__states.setdefault(user_id, state)
+
+        return {_id: self.__states[_id] for _id in user_ids}
+
+    async def load_updates_offset(self) -> int:
+        if self.__offset is None:
+            offset = await self.storage.load_updates_offset()
+            if self.__offset is None:
+                self.__offset = offset
+
+        return self.__offset
+
+    async def store(
+        self,
+        *,
+        states: Mapping[str, str],
+        updates_offset: None | int = None,
+    ) -> None:
+        self.__states.update(states)
+        self.__dirty_states.update(states)
+
+        if updates_offset is not None:
+            self.__offset = self.__dirty_offset = updates_offset
+
+        self.start()
+
+    @asynccontextmanager
+    async def batch(
+        self,
+        user_ids: Iterable[str] = (),
+    ) -> AsyncGenerator[None, None]:
+        """
+        Groups the changes made within the context
+        to be stored with a single write when it exits.
+
+        The states of the given users are loaded at once on enter.
+        Periodic flushes are suspended while any batch is open.
+        """
+
+        await self.load_states(set(user_ids))
+
+        self.__batches += 1
+        try:
+            yield
+        finally:
+            self.__batches -= 1
+
+        if not self.__batches:
+            await self.flush()
+
+    async def flush(self) -> None:
+        """
+        Stores all the pending changes into the underlying storage.
+        """
+
+        async with self.__lock:
+            if not self.is_dirty:
+                return
+
+            states, self.__dirty_states = self.__dirty_states, {}
+            offset, self.__dirty_offset = self.__dirty_offset, None
+
+            try:
+                await self.storage.store(
+                    states=states,
+                    updates_offset=offset,
+                )
+            except BaseException:
+                # keep the changes made while flushing: they are newer
+                self.__dirty_states = states | self.__dirty_states
+                if self.__dirty_offset is None:
+                    self.__dirty_offset = offset
+                raise
+
+    def start(self) -> None:
+        """
+        Starts periodic flushes.
+        """
+
+        if self.__flusher is None:
+            self.__flusher = asyncio.create_task(self._flush_periodically())
+
+    async def close(self) -> None:
+        if self.__flusher is not None:
+            self.__flusher.cancel()
+            await asyncio.gather(self.__flusher, return_exceptions=True)
+            self.__flusher = None
+
+        await self.flush()
+        await self.storage.close()
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            if self.__batches:
+                continue
+            try:
+                await self.flush()
+            except Exception:  # noqa: B902
+                traceback.print_exc()
+
+
+class Persistence:
+    DB_FILE = DIR_ARTIFACTS / "samurai.sqlite3"
+    LEGACY_DB_FILE = DIR_ARTIFACTS / "samurai.json"
+
+    def __init__(
+        self,
+        storage: None | Storage = None,
+        *,
+        flush_interval: float = 1,
+    ) -> None:
+        """
+        :param storage: a storage to keep the data in, SQLite by default
+
+        :param flush_interval: seconds between periodic flushes
+        """
+
+        self.storage = WriteBackCache(
+            storage
+            or SqliteStorage(  # noqa: W503
+                self.DB_FILE,
+                legacy=self.LEGACY_DB_FILE,
+            ),
+            interval=flush_interval,
+        )
+
+        # update id -> (user id, state): not committed yet
+        self._staged: dict[int, tuple[str, str]] = {}
+        # user id -> (update id, state): the latest staged state
+        self._latest: dict[str, tuple[int, str]] = {}
+
+    async def __aenter__(self) -> "Persistence":
+        self.storage.start()
+        return self
+
+    async def __aexit__(self, *_exc: object) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        await self.storage.close()
+
+    def batch(
+        self,
+        user_ids: Iterable[str | int] = (),
+    ) -> AsyncContextManager[None]:
+        """
+        Commits all the states and the offset stored within the context
+        in one write:
+
+            async with db.batch(user_ids):
+                ...
+        """
+
+        return self.storage.batch(str(_id) for _id in user_ids)
+
+    async def flush(self) -> None:
+        await self.storage.flush()
+
+    async def load_states(self, user_ids: Iterable[str | int]) -> None:
+        """
+        Loads the states of all the given users at once.
+        """
+
+        await self.storage.load_states({str(_id) for _id in user_ids})
+
+    async def load_state(self, user_id: str | int) -> None | str:
+        latest = self._latest.get(str(user_id))
+        if latest is not None:
+            return latest[1]
+
+        return await self.storage.load_state(str(user_id))
+
+    def stage_state(
+        self,
+        update_id: int,
+        user_id: str | int,
+        state: str,
+    ) -> None:
+        """
+        Keeps the state the update has led to until it is committed.
+
+        The staged state is loaded as the current one of the user,
+        but it is stored only by the `commit` past the update.
+        """
+
+        self._staged[update_id] = (str(user_id), state)
+        self._latest[str(user_id)] = (update_id, state)
+
+    async def commit(self, updates_offset: int) -> None:
+        """
+        Stores the states staged by the updates before the offset
+        together with the offset.
+
+        The states of the updates after the offset are kept staged:
+        if the process stops, these updates come again
+        and must not find the states they have led to.
+        """
+
+        if updates_offset <= await self.load_updates_offset():
+            return
+
+        states = {}
+        for update_id in sorted(self._staged):
+            if update_id >= updates_offset:
+                break
+
+            user_id, state = self._staged.pop(update_id)
+            states[user_id] = state
+
+            if self._latest[user_id][0] == update_id:
+                del self._latest[user_id]
+
+        await self.storage.store(states=states, updates_offset=updates_offset)
+
+    async def store_state(self, user_id: str | int, state: str) -> None:
+        await self.storage.store(states={str(user_id): state})
+
+    async def load_updates_offset(self) -> int:
+        return await self.storage.load_updates_offset()
+
+    async def store_updates_offset(self, updates_offset: int) -> None:
+        await self.storage.store(states={}, updates_offset=updates_offset)
@@ -1,6 +1,33 @@
+import asyncio
+from datetime import datetime
+from io import BytesIO
+from pathlib import Path
+from typing import Any
+from typing import AsyncGenerator
+from typing import AsyncIterator
+from typing import Awaitable
+from typing import Callable
+
+import aiohttp
 import pytest
+import pytest_asyncio
+from yarl import URL
 
+from oyabun import errors
+from oyabun.bot import _current_priority
 from oyabun.bot import Bot
+from oyabun.bot import ConnectionPoolConfig
+from oyabun.bot import Priority
+from oyabun.bot import SendQueue
+from oyabun.telegram import File
+from oyabun.telegram import InputFile
+from oyabun.telegram import InputMediaDocument
+from oyabun.telegram import InputMediaPhoto
+from oyabun.telegram import Message
+from oyabun.telegram import SlotsType
+from oyabun.telegram.slots import SLOTS
+from tests.bot_test_app import make_failure
+from tests.bot_test_app import TelegramApp
 
 pytestmark = [
     pytest.mark.asyncio,
@@ -15,9 +42,398 @@ async def test_answerCallbackQuery(test_bot: Bot) -> None:
     assert answered
 
 
+async def test_trust_responses(
+    make_bot: Callable[..., Awaitable[Bot]],
+    test_bot: Bot,
+) -> None:
+    bot = await make_bot(trust_responses=True)
+
+    sent = await bot.sendMessage(chat_id=1, text="text")
+    expected = await test_bot.sendMessage(chat_id=1, text="text")
+
+    assert sent.dict(exclude={"date"}) == expected.dict(exclude={"date"})
+    assert isinstance(sent.date, datetime)
+
+
+async def test_lazy_responses(
+    make_bot: Callable[..., Awaitable[Bot]],
+    test_bot: Bot,
+) -> None:
+    bot = await make_bot(lazy_responses=True)
+
+    sent = await bot.sendMessage(chat_id=1, text="text")
+    expected = await test_bot.sendMessage(chat_id=1, text="text")
+
+    assert isinstance(sent, Message)
+    assert not sent.__dict__
+    assert sent.chat.dict() == expected.chat.dict()
+    assert sent.dict(exclude={"date"}) == expected.dict(exclude={"date"})
+
+
+async def test_slots_backend(
+    monkeypatch: pytest.MonkeyPatch,
+    test_bot: Bot,
+) -> None:
+    monkeypatch.setattr("oyabun.bot.MODEL_BACKEND", SLOTS)
+
+    sent = await test_bot.sendMessage(chat_id=1, text="text")
+
+    assert isinstance(sent, SlotsType)
+    assert sent.text == "text"
+    assert sent.chat.id == 1
+
+
 async def test_getMe(test_bot: Bot) -> None:
     me = await test_bot.getMe()
 
     assert me.id == 1
     assert me.is_bot is True
     assert me.first_name == "FN"
+
+
+async def test_pool_stats(test_bot: Bot) -> None:
+    await asyncio.gather(*(test_bot.getMe() for _ in range(4)))
+    stats = test_bot.pool_stats
+
+    assert stats is not None
+    assert stats.acquired == 0
+    assert 1 <= stats.idle <= 4
+    assert stats.limit == stats.limit_per_host == 100
+
+
+async def test_pool_stats_acquired(test_bot: Bot, file: File) -> None:
+    stream = test_bot.streamFile(file=file, chunk_size=1000)
+
+    async for _chunk in stream:
+        stats = test_bot.pool_stats
+        assert stats is not None
+        assert stats.acquired == 1
+        break
+
+    await stream.aclose()
+
+    stats = test_bot.pool_stats
+    assert stats is not None
+    assert stats.acquired == 0
+
+
+async def test_pool_stats_connector_layout() -> None:
+    # pool_stats reads these private counters of aiohttp
+    connector = aiohttp.TCPConnector()
+    try:
+        assert isinstance(connector._acquired, set)
+        assert isinstance(connector._conns, dict)
+    finally:
+        await connector.close()
+
+
+async def test_pool_config(make_bot: Callable[..., Awaitable[Bot]]) -> None:
+    pool = ConnectionPoolConfig(limit=2, limit_per_host=1)
+    bot = await make_bot(bind_session=False, pool=pool)
+
+    assert bot.pool_stats is None
+
+    async with bot.client_session():
+        await asyncio.gather(*(bot.getMe() for _ in range(4)))
+        stats = bot.pool_stats
+
+    assert stats is not None
+    assert stats.idle == 1
+    assert (stats.limit, stats.limit_per_host) == (2, 1)
+    assert bot.pool_stats is None
+
+
+async def test_endpoint_cache(test_bot: Bot) -> None:
+    url = test_bot._get_endpoint("getMe")
+
+    assert url is test_bot._get_endpoint("getMe")
+    assert str(url) == f"{test_bot.api_url}/getMe"
+
+    bot = Bot("token")
+    bot._get_endpoint("getMe")
+    bot.TELEGRAM_BOT_API_URL = "http://localhost"
+    assert str(bot._get_endpoint("getMe")) == "http://localhost/bottoken/getMe"
+
+
+async def test_post_in_bound_session(
+    make_bot: Callable[..., Awaitable[Bot]],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    bot = await make_bot()
+    posts: list[tuple[aiohttp.ClientSession, URL]] = []
+    post = bot._post
+
+    async def spy(
+        session: aiohttp.ClientSession,
+        url: URL,
+        *args: Any,
+    ) -> tuple[int, bytes]:
+        posts.append((session, url))
+        return await post(session, url, *args)
+
+    def client_session() -> None:
+        raise AssertionError("the bound session must be used directly")
+
+    monkeypatch.setattr(bot, "_post", spy)
+    monkeypatch.setattr(bot, "client_session", client_session)
+
+    await bot.getMe()
+    await bot.getMe()
+
+    # the very same session and the cached URL for every call
+    (session1, url1), (session2, url2) = posts
+    assert session1 is session2
+    assert url1 is url2 is bot._get_endpoint("getMe")
+
+
+async def test_bound_session_fast_path(
+    test_bot: Bot,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    def client_session() -> None:
+        raise AssertionError("the bound session must be used directly")
+
+    monkeypatch.setattr(test_bot, "client_session", client_session)
+
+    me = await test_bot.getMe()
+    assert me.id == 1
+
+
+async def test_broadcast(test_bot: Bot, telegram_app: TelegramApp) -> None:
+    async def chat_ids() -> AsyncIterator[int]:
+        for chat_id in range(1, 21):
+            yield chat_id
+
+    telegram_app.failures.append(make_failure(403))
+
+    results = [
+        _r
+        async for _r in test_bot.broadcast(
+            chat_ids(),
+            concurrency=4,
+            text="text",
+        )
+    ]
+
+    assert sorted(_r.chat_id for _r in results) == list(range(1, 21))
+
+    failed = [_r for _r in results if _r.error is not None]
+    assert len(failed) == 1
+    assert isinstance(failed[0].error, errors.Forbidden)
+
+    for result in results:
+        if result.message is not None:
+            assert result.message.chat.id == result.chat_id
+            assert result.message.text == "text"
+
+    stats = results[-1].stats
+    assert (stats.sent, stats.failed) == (19, 1)
+    assert stats.rate > 0
+    assert [_r.stats.sent + _r.stats.failed for _r in results] == list(
+        range(1, 21)
+    )
+
+
+async def test_broadcast_priority(test_bot: Bot) -> None:
+    broadcast = test_bot.broadcast([1, 2, 3], concurrency=1, text="text")
+
+    async for _result in broadcast:
+        assert _current_priority.get() is None
+        break
+
+    await broadcast.aclose()
+    assert _current_priority.get() is None
+
+    async for _result in test_bot.broadcast([1, 2], text="text"):
+        assert _current_priority.get() is None
+
+    assert _current_priority.get() is None
+
+
+async def test_send_queue_order() -> None:
+    queue = SendQueue(max_in_flight=1)
+    done: list[Priority] = []
+
+    async def call(priority: Priority) -> None:
+        async with queue.slot(priority):
+            done.append(priority)
+
+    async with queue.slot(Priority.INTERACTIVE):
+        tasks = [
+            asyncio.create_task(call(_p))
+            for _p in (Priority.BULK, Priority.EDIT, Priority.BULK)
+        ]
+        tasks.append(asyncio.create_task(call(Priority.INTERACTIVE)))
+        await asyncio.sleep(0)
+
+        assert queue.in_flight == 1
+        assert queue.pending == 4
+
+        tasks[1].cancel()
+
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    assert done == [Priority.INTERACTIVE, Priority.BULK, Priority.BULK]
+    assert queue.in_flight == queue.pending == 0
+
+
+async def test_send_queue_bot(
+    make_bot: Callable[..., Awaitable[Bot]],
+) -> None:
+    queue = SendQueue(max_in_flight=2)
+    bot = await make_bot(send_queue=queue)
+
+    assert queue.get_priority("sendMessage") == Priority.INTERACTIVE
+    assert queue.get_priority("editMessageText") == Priority.EDIT
+    with SendQueue.priority(Priority.BULK):
+        assert queue.get_priority("sendMessage") == Priority.BULK
+
+    futures = [
+        queue.submit(bot.sendMessage(chat_id=_i, text="t"), Priority.BULK)
+        for _i in range(1, 6)
+    ]
+    answered = await bot.answerCallbackQuery(callback_query_id="cbq")
+    sent = await asyncio.gather(*futures)
+
+    assert answered
+    assert [_m.chat.id for _m in sent] == [1, 2, 3, 4, 5]
+    assert queue.in_flight == queue.pending == 0
+
+
+@pytest.mark.parametrize(
+    "photo,expected",
+    [
+        (b"bytes", "InputFile:application/octet-stream:bytes"),
+        (
+            bytearray(b"bytearray"),
+            "InputFile:application/octet-stream:bytearray",
+        ),
+        (
+            memoryview(b"memoryview"),
+            "InputFile:application/octet-stream:memoryview",
+        ),
+        (BytesIO(b"stream"), "InputFile:application/octet-stream:stream"),
+        (
+            InputFile(b"input", content_type="image/png", filename="x.png"),
+            "x.png:image/png:input",
+        ),
+    ],
+)
+async def test_sendPhoto(test_bot: Bot, photo: object, expected: str) -> None:
+    sent = await test_bot.sendPhoto(chat_id=1, photo=photo)  # type: ignore
+
+    assert sent.chat.id == 1
+    assert sent.caption == expected
+
+
+async def test_sendMediaGroup(test_bot: Bot, tmp_path: Path) -> None:
+    path = tmp_path / "doc.txt"
+    path.write_bytes(b"path")
+
+    sent = await test_bot.sendMediaGroup(
+        chat_id=1,
+        media=[
+            InputMediaPhoto(media=b"bytes"),
+            InputMediaPhoto(media="file_id"),
+            InputMediaDocument(media=path),
+        ],
+    )
+
+    assert [_m.caption for _m in sent] == [
+        "InputFile:application/octet-stream:bytes",
+        "file_id",
+        "doc.txt:text/plain:path",
+    ]
+
+
+async def test_sendPhoto_path(test_bot: Bot, tmp_path: Path) -> None:
+    path = tmp_path / "photo.jpg"
+    path.write_bytes(b"path")
+
+    sent = await test_bot.sendPhoto(chat_id=1, photo=path)
+
+    assert sent.caption == "photo.jpg:image/jpeg:path"
+
+
+CONTENT = bytes(range(256)) * 1000
+
+
+@pytest_asyncio.fixture
+async def file(telegram_app: TelegramApp) -> AsyncGenerator[File, None]:
+    telegram_app.files["photos/file.jpg"] = CONTENT
+    yield File(
+        file_id="id",
+        file_path="photos/file.jpg",
+        file_unique_id="uid",
+    )
+    telegram_app.files.clear()
+
+
+async def test_downloadFile(test_bot: Bot, file: File) -> None:
+    buffer = await test_bot.downloadFile(file=file)
+
+    assert buffer.read() == CONTENT
+
+
+async def test_downloadFileTo(
+    test_bot: Bot,
+    file: File,
+    tmp_path: Path,
+) -> None:
+    path = tmp_path / "file.jpg"
+
+    got = await test_bot.downloadFileTo(file=file, path=path)
+
+    assert got == path
+    assert path.read_bytes() == CONTENT
+
+
+async def test_downloadFileTo_failed(
+    monkeypatch: pytest.MonkeyPatch,
+    test_bot: Bot,
+    file: File,
+    tmp_path: Path,
+) -> None:
+    async def stream_file(*_args: object) -> AsyncIterator[bytes]:
+        yield CONTENT[:1000]
+        raise errors.NetworkError("connection lost")
+
+    monkeypatch.setattr(test_bot, "_stream_file", stream_file)
+
+    path = tmp_path / "file.jpg"
+
+    with pytest.raises(errors.NetworkError):
+        await test_bot.downloadFileTo(file=file, path=path)
+
+    assert not list(tmp_path.iterdir())
+
+    path.write_bytes(b"old")
+
+    with pytest.raises(errors.NetworkError):
+        await test_bot.downloadFileTo(file=file, path=path)
+
+    assert list(tmp_path.iterdir()) == [path]
+    assert path.read_bytes() == b"old"
+
+
+async def test_streamFile(test_bot: Bot, file: File) -> None:
+    chunks = [
+        chunk
+        async for chunk in test_bot.streamFile(file=file, chunk_size=1000)
+    ]
+
+    assert all(len(_chunk) <= 1000 for _chunk in chunks)
+    assert b"".join(chunks) == CONTENT
+
+
+async def test_download_errors(test_bot: Bot) -> None:
+    missing = File(file_id="id", file_path="missing", file_unique_id="uid")
+    no_path = File(file_id="id", file_unique_id="uid")
+
+    for file in (missing, no_path):
+        with pytest.raises(Bot.RequestError):
+            await test_bot.downloadFile(file=file)
+
+        with pytest.raises(Bot.RequestError):
+            async for _chunk in test_bot.streamFile(file=file):
+                pass
@@ -1,11 +1,18 @@
+from datetime import datetime
+from datetime import timezone
 from functools import wraps
 from typing import Any
 from typing import Callable
 from uuid import uuid4
 
+import orjson
 from aiohttp import web
 
+from oyabun.telegram import Chat
+from oyabun.telegram import Message
 from oyabun.telegram import Response
+from oyabun.telegram import ResponseParameters
+from oyabun.telegram import Update
 from oyabun.telegram import User
 from oyabun.telegram.base import TelegramBotApiType
 
@@ -58,14 +65,143 @@ async def getMe(request: web.Request) -> TelegramBotApiType:
     return obj
 
 
+@api_method
+async def getUpdates(request: web.Request) -> list[Update]:
+    rq = await request.json()
+
+    app = request.app
+    assert isinstance(app, TelegramApp)
+
+    offset = rq.get("offset") or 0
+    limit = rq.get("limit") or 100
+
+    updates = [_u for _u in app.updates if _u.update_id >= offset]
+
+    return updates[:limit]
+
+
+@api_method
+async def sendMediaGroup(request: web.Request) -> list[Message]:
+    rq = await request.post()
+
+    chat = Chat(id=int(str(rq["chat_id"])), type="private")
+    media = orjson.loads(str(rq["media"]))
+
+    messages = []
+
+    for i, item in enumerate(media, start=1):
+        caption = item["media"]
+
+        if caption.startswith("attach://"):
+            part = rq[caption.removeprefix("attach://")]
+            assert isinstance(part, web.FileField)
+            content = part.file.read().decode()
+            caption = f"{part.filename}:{part.content_type}:{content}"
+
+        obj = Message(
+            caption=caption,
+            chat=chat,
+            date=datetime.now(timezone.utc),
+            message_id=i,
+        )
+        messages.append(obj)
+
+    return messages
+
+
+@api_method
+async def sendMessage(request: web.Request) -> TelegramBotApiType:
+    rq = await request.json()
+
+    obj = Message(
+        chat=Chat(id=rq["chat_id"], type="private"),
+        date=datetime.now(timezone.utc),
+        message_id=1,
+        text=rq["text"],
+    )
+
+    return obj
+
+
+@api_method
+async def sendPhoto(request: web.Request) -> TelegramBotApiType:
+    rq = await request.post()
+
+    photo = rq["photo"]
+    assert isinstance(photo, web.FileField)
+
+    content = photo.file.read()
+
+    obj = Message(
+        caption=f"{photo.filename}:{photo.content_type}:{content.decode()}",
+        chat=Chat(id=int(str(rq["chat_id"])), type="private"),
+        date=datetime.now(timezone.utc),
+        message_id=1,
+    )
+
+    return obj
+
+
+async def download_file(request: web.Request) -> web.Response:
+    app = request.app
+    assert isinstance(app, TelegramApp)
+
+    content = app.files.get(request.match_info["file_path"])
+    if content is None:
+        raise web.HTTPNotFound(text="no file")
+
+    return web.Response(body=content)
+
+
+@web.middleware
+async def fail(request: web.Request, handler: Callable) -> web.StreamResponse:
+    """
+    Responds with the prepared failures before calling the handler.
+    """
+
+    app = request.app
+    assert isinstance(app, TelegramApp)
+
+    if app.failures:
+        return app.failures.pop(0)
+
+    response: web.StreamResponse = await handler(request)
+    return response
+
+
+def make_failure(
+    status: int,
+    *,
+    migrate_to_chat_id: None | int = None,
+    retry_after: None | int = None,
+) -> web.Response:
+    rs: Response = Response(
+        description=f"failure {status}",
+        error_code=status,
+        ok=False,
+        parameters=ResponseParameters(
+            migrate_to_chat_id=migrate_to_chat_id,
+            retry_after=retry_after,
+        ),
+    )
+
+    return web.json_response(body=rs.jsonb(), status=status)
+
+
 class TelegramApp(web.Application):
     def __init__(self, *args: Any, **kwargs: Any) -> None:
-        super().__init__(*args, **kwargs)
+        super().__init__(*args, middlewares=[fail], **kwargs)
         self.__token = str(uuid4())
+        self.failures: list[web.Response] = []
+        self.files: dict[str, bytes] = {}
+        self.updates: list[Update] = []
 
         for method_name, method_handler in _method_handlers.items():
             url = f"/bot{self.__token}/{method_name}"
             self.router.add_post(url, method_handler)
 
+        url = f"/file/bot{self.__token}/{{file_path:.+}}"
+        self.router.add_get(url, download_file)
+
     def get_telegram_bot_api_token(self) -> str:
         return self.__token
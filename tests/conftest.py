@@ -1,6 +1,10 @@
 import asyncio
 from asyncio import AbstractEventLoop
+from contextlib import AsyncExitStack
+from typing import Any
 from typing import AsyncGenerator
+from typing import Awaitable
+from typing import Callable
 
 import pytest
 import pytest_asyncio
@@ -15,9 +19,14 @@ def event_loop() -> AbstractEventLoop:
     return asyncio.get_event_loop()
 
 
+@pytest.fixture(scope="session")
+def telegram_app() -> TelegramApp:
+    return TelegramApp()
+
+
 @pytest_asyncio.fixture(scope="session")
-async def test_bot() -> AsyncGenerator[Bot, None]:
-    tg = TelegramApp()
+async def test_bot(telegram_app: TelegramApp) -> AsyncGenerator[Bot, None]:
+    tg = telegram_app
     server: TestServer = TestServer(tg)
     await server.start_server()
 
@@ -28,3 +37,29 @@ async def test_bot() -> AsyncGenerator[Bot, None]:
         yield bot
 
     await server.close()
+
+
+@pytest_asyncio.fixture
+async def make_bot(
+    test_bot: Bot,
+    telegram_app: TelegramApp,
+) -> AsyncGenerator[Callable[..., Awaitable[Bot]], None]:
+    """
+    Provides a factory of bots which talk to the test app.
+
+    Bots get a client session till the end of the test,
+    unless `bind_session=False` is given.
+    """
+
+    async with AsyncExitStack() as stack:
+
+        async def make(*, bind_session: bool = True, **kwargs: Any) -> Bot:
+            bot = Bot(telegram_app.get_telegram_bot_api_token(), **kwargs)
+            bot.TELEGRAM_BOT_API_URL = test_bot.TELEGRAM_BOT_API_URL
+
+            if bind_session:
+                await stack.enter_async_context(bot.client_session())
+
+            return bot
+
+        yield make
@@ -0,0 +1,94 @@
+import pytest
+from aiohttp import web
+
+from oyabun import errors
+from oyabun.bot import Bot
+from oyabun.telegram import File
+from oyabun.telegram import Response
+from oyabun.telegram import ResponseParameters
+from tests.bot_test_app import make_failure
+from tests.bot_test_app import TelegramApp
+
+pytestmark = [
+    pytest.mark.asyncio,
+]
+
+
+@pytest.mark.parametrize(
+    "status,params,expected",
+    [
+        (400, None, errors.BadRequest),
+        (400, ResponseParameters(migrate_to_chat_id=-1), errors.ChatMigrated),
+        (401, None, errors.Unauthorized),
+        (403, None, errors.Forbidden),
+        (404, None, errors.ApiError),
+        (429, ResponseParameters(retry_after=1), errors.FloodWait),
+        (502, None, errors.ServerError),
+    ],
+)
+async def test_build(
+    status: int,
+    params: None | ResponseParameters,
+    expected: type[errors.ApiError],
+) -> None:
+    response: Response = Response(
+        description="description",
+        error_code=status,
+        ok=False,
+        parameters=params,
+    )
+
+    error = errors.ApiError.build(response, status=status)
+
+    assert type(error) is expected
+    assert error.error_code == status
+    assert str(error) == "description"
+
+
+async def test_build_without_response() -> None:
+    error = errors.ApiError.build(None, body=b"Bad Gateway", status=502)
+
+    assert isinstance(error, errors.ServerError)
+    assert error.error_code == 502
+    assert str(error) == "Bad Gateway"
+
+
+async def test_flood_wait(test_bot: Bot, telegram_app: TelegramApp) -> None:
+    telegram_app.failures.append(make_failure(429, retry_after=3))
+
+    with pytest.raises(errors.FloodWait) as excinfo:
+        await test_bot.sendMessage(chat_id=1, text="text")
+
+    error = excinfo.value
+    assert isinstance(error, Bot.RequestError)
+    assert error.error_code == 429
+    assert error.retry_after == 3
+    assert error.method == "sendMessage"
+    assert error.elapsed is not None and error.elapsed > 0
+
+
+async def test_api_refusal(test_bot: Bot) -> None:
+    with pytest.raises(errors.ApiError) as excinfo:
+        await test_bot.answerCallbackQuery(callback_query_id="")
+
+    assert excinfo.value.method == "answerCallbackQuery"
+
+
+async def test_parse_error(test_bot: Bot, telegram_app: TelegramApp) -> None:
+    telegram_app.failures.append(web.Response(body=b"not json"))
+
+    with pytest.raises(errors.ParseError):
+        await test_bot.getMe()
+
+
+async def test_network_error() -> None:
+    bot = Bot("token")
+    bot.TELEGRAM_BOT_API_URL = "http://127.0.0.1:1"
+
+    with pytest.raises(errors.NetworkError):
+        await bot.getMe()
+
+    with pytest.raises(errors.NetworkError):
+        await bot.downloadFile(
+            file=File(file_id="id", file_path="path", file_unique_id="uid")
+        )
@@ -0,0 +1,160 @@
+import asyncio
+from typing import Any
+from typing import AsyncGenerator
+
+import pytest
+import pytest_asyncio
+
+from oyabun.bot import Bot
+from oyabun.polling import LongPolling
+from oyabun.telegram import Update
+from tests.bot_test_app import TelegramApp
+
+pytestmark = [
+    pytest.mark.asyncio,
+]
+
+
+def make_update(update_id: int) -> Update:
+    return Update.parse_obj(
+        {
+            "update_id": update_id,
+            "message": {
+                "chat": {"id": 1, "type": "private"},
+                "date": 0,
+                "message_id": update_id,
+                "text": f"text {update_id}",
+            },
+        }
+    )
+
+
+@pytest_asyncio.fixture
+async def updates(
+    telegram_app: TelegramApp,
+) -> AsyncGenerator[list[Update], None]:
+    telegram_app.updates = [make_update(_i) for _i in range(10, 35)]
+    yield telegram_app.updates
+    telegram_app.updates = []
+
+
+async def test_polling(test_bot: Bot, updates: list[Update]) -> None:
+    received = []
+
+    async with LongPolling(test_bot, min_limit=5, timeout=0) as polling:
+        async for update in polling:
+            received.append(update)
+            if len(received) == len(updates):
+                break
+
+    assert [_u.update_id for _u in received] == list(range(10, 35))
+    assert polling.offset == 35
+
+
+async def test_polling_offset(test_bot: Bot, updates: list[Update]) -> None:
+    async with LongPolling(test_bot, offset=30, timeout=0) as polling:
+        async for batch in polling.batches():
+            break
+
+    assert [_u.update_id for _u in batch] == list(range(30, 35))
+
+
+async def test_polling_adaptive_limit(
+    test_bot: Bot,
+    updates: list[Update],
+) -> None:
+    sizes = []
+
+    async with LongPolling(test_bot, min_limit=2, timeout=0) as polling:
+        async for batch in polling.batches():
+            sizes.append(len(batch))
+            if sum(sizes) == len(updates):
+                break
+
+    assert sizes[:3] == [2, 4, 8]
+
+
+@pytest.fixture
+def polls(monkeypatch: pytest.MonkeyPatch, test_bot: Bot) -> list[None | int]:
+    offsets: list[None | int] = []
+    get_updates = test_bot.getUpdates
+
+    async def spy(**kw: Any) -> list[Update]:
+        offsets.append(kw.get("offset"))
+        return await get_updates(**kw)
+
+    monkeypatch.setattr(test_bot, "getUpdates", spy)
+
+    return offsets
+
+
+async def test_polling_commit(
+    polls: list[None | int],
+    test_bot: Bot,
+    updates: list[Update],
+) -> None:
+    polling = LongPolling(
+        test_bot,
+        auto_commit=False,
+        idle_delay=60,
+        min_limit=5,
+        timeout=0,
+    )
+    received: list[int] = []
+
+    async with polling:
+        batches = polling.batches()
+
+        while len(received) < len(updates):
+            batch = await anext(batches)
+            received.extend(_u.update_id for _u in batch)
+
+        # fetched ahead, but nothing is acknowledged until committed
+        assert received == list(range(10, 35))
+        assert set(polls) == {None}
+        assert polling.offset is None
+
+        # the commit wakes the idle poller up at once
+        polling.commit(35)
+        while polls[-1] != 35:
+            await asyncio.sleep(0.01)
+
+    assert polling.offset == 35
+
+
+async def test_polling_commit_slow_update(
+    test_bot: Bot,
+    telegram_app: TelegramApp,
+) -> None:
+    telegram_app.updates = [make_update(10)]
+    polling = LongPolling(
+        test_bot,
+        auto_commit=False,
+        idle_delay=0.01,
+        min_limit=1,
+        timeout=0,
+    )
+
+    try:
+        async with polling:
+            batches = polling.batches()
+            batch = await anext(batches)
+            assert [_u.update_id for _u in batch] == [10]
+
+            # the update 10 is not committed, but the next one comes
+            telegram_app.updates.append(make_update(11))
+            batch = await asyncio.wait_for(anext(batches), 5)
+            assert [_u.update_id for _u in batch] == [11]
+    finally:
+        telegram_app.updates = []
+
+
+async def test_polling_idle(polls: list[None | int], test_bot: Bot) -> None:
+    async with LongPolling(test_bot, idle_delay=60, timeout=0):
+        while not polls:
+            await asyncio.sleep(0.01)
+
+        # an empty poll is not repeated at once
+        await asyncio.sleep(0.05)
+
+    assert polls == [None]
@@ -0,0 +1,114 @@
+import asyncio
+from typing import Awaitable
+from typing import Callable
+
+import pytest
+
+from oyabun.bot import Bot
+from oyabun.ratelimit import RateLimit
+from oyabun.ratelimit import RateLimiter
+from oyabun.ratelimit import TokenBucket
+
+pytestmark = [
+    pytest.mark.asyncio,
+]
+
+
+async def test_token_bucket() -> None:
+    bucket = TokenBucket(RateLimit(2, 1), now=0)
+
+    assert bucket.is_full(0)
+    bucket.take(0)
+    bucket.take(0)
+    assert bucket.delay(0) == 0.5
+    assert bucket.delay(0.25) == 0.25
+    assert bucket.delay(0.5) == 0
+    assert bucket.is_full(10)
+
+
+async def settle() -> None:
+    # lets all the ready tasks run
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+async def test_private_limit() -> None:
+    now = 0.0
+    limiter = RateLimiter(
+        clock=lambda: now,
+        private_limit=RateLimit(1, 60),
+    )
+    granted: list[int] = []
+
+    async def send(chat_id: int) -> None:
+        await limiter.wait(chat_id)
+        granted.append(chat_id)
+
+    tasks = [asyncio.create_task(send(1)) for _ in range(3)]
+    await settle()
+
+    assert granted == [1]
+    assert limiter.pending == 2
+
+    # the new chat wakes the limiter up: it sees the time passed
+    now = 60
+    await send(2)
+    await settle()
+
+    assert granted == [1, 1, 2]
+    assert limiter.pending == 1
+
+    tasks[-1].cancel()
+    await send(3)
+
+    assert limiter.pending == 0
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def test_group_limit() -> None:
+    limiter = RateLimiter(group_limit=RateLimit(1, 60))
+
+    for chat_id in (-1, "@channel"):
+        await limiter.wait(chat_id)
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(limiter.wait(chat_id), 0.05)
+
+    # private chats are not affected
+    await asyncio.wait_for(limiter.wait(1), 0.05)
+    assert limiter.pending == 0
+
+
+async def test_fairness() -> None:
+    limiter = RateLimiter(
+        global_limit=RateLimit(1, 0.01),
+        private_limit=RateLimit(100),
+    )
+    granted: list[int] = []
+
+    async def send(chat_id: int) -> None:
+        await limiter.wait(chat_id)
+        granted.append(chat_id)
+
+    await asyncio.gather(
+        *(send(1) for _ in range(3)), *(send(2) for _ in range(3))
+    )
+
+    assert granted == [1, 2, 1, 2, 1, 2]
+
+
+async def test_bot_rate_limiter(
+    make_bot: Callable[..., Awaitable[Bot]],
+) -> None:
+    class Limiter(RateLimiter):
+        async def wait(self, chat_id: None | int | str) -> None:
+            waited.append(chat_id)
+            await super().wait(chat_id)
+
+    waited: list[None | int | str] = []
+
+    bot = await make_bot(rate_limiter=Limiter())
+
+    await bot.getMe()
+    await bot.sendPhoto(chat_id=1, photo=b"")
+
+    assert waited == [1]
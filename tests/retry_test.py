@@ -0,0 +1,135 @@
+from typing import AsyncGenerator
+from typing import Awaitable
+from typing import Callable
+
+import pytest
+import pytest_asyncio
+
+from oyabun.bot import Bot
+from oyabun.retry import RetryPolicy
+from oyabun.telegram import Response
+from oyabun.telegram import ResponseParameters
+from tests.bot_test_app import make_failure
+from tests.bot_test_app import TelegramApp
+
+pytestmark = [
+    pytest.mark.asyncio,
+]
+
+
+@pytest.fixture
+def policy() -> RetryPolicy:
+    return RetryPolicy(jitter=lambda: 0)
+
+
+@pytest_asyncio.fixture
+async def bot(
+    make_bot: Callable[..., Awaitable[Bot]],
+    policy: RetryPolicy,
+    telegram_app: TelegramApp,
+) -> AsyncGenerator[Bot, None]:
+    yield await make_bot(retry_policy=policy)
+
+    telegram_app.failures.clear()
+
+
+async def test_backoff() -> None:
+    policy = RetryPolicy(attempts=10, jitter=lambda: 1, max_backoff=3)
+
+    delays = [policy.get_delay("getMe", _a) for _a in range(1, 6)]
+
+    assert delays == [0.5, 1, 2, 3, 3]
+    assert policy.counters == {RetryPolicy.NETWORK: 5}
+
+    assert policy.get_delay("getMe", 10) is None
+    assert policy.get_delay("sendMessage", 1) is None
+    assert policy.get_delay("getMe", 1, status=400) is None
+
+    flood: Response = Response(
+        ok=False,
+        parameters=ResponseParameters(retry_after=7),
+    )
+    assert policy.get_delay("sendMessage", 1, response=flood) == 7
+
+
+async def test_flood(
+    bot: Bot,
+    policy: RetryPolicy,
+    telegram_app: TelegramApp,
+) -> None:
+    telegram_app.failures.append(make_failure(429, retry_after=0))
+
+    sent = await bot.sendMessage(chat_id=1, text="text")
+
+    assert sent.text == "text"
+    assert policy.counters == {RetryPolicy.FLOOD: 1}
+
+
+async def test_flood_too_long(bot: Bot, telegram_app: TelegramApp) -> None:
+    telegram_app.failures.append(make_failure(429, retry_after=600))
+
+    with pytest.raises(Bot.RequestError, match="failure 429"):
+        await bot.sendMessage(chat_id=1, text="text")
+
+
+async def test_server_error(
+    bot: Bot,
+    policy: RetryPolicy,
+    telegram_app: TelegramApp,
+) -> None:
+    telegram_app.failures.extend([make_failure(500), make_failure(502)])
+
+    me = await bot.getMe()
+
+    assert me.id == 1
+    assert policy.counters == {RetryPolicy.SERVER: 2}
+
+    telegram_app.failures.extend(make_failure(500) for _ in range(3))
+
+    with pytest.raises(Bot.RequestError, match="failure 500"):
+        await bot.getMe()
+
+    assert not telegram_app.failures
+
+
+async def test_server_error_unsafe(
+    bot: Bot,
+    telegram_app: TelegramApp,
+) -> None:
+    telegram_app.failures.extend([make_failure(500), make_failure(500)])
+
+    with pytest.raises(Bot.RequestError, match="failure 500"):
+        await bot.sendMessage(chat_id=1, text="text")
+
+    assert len(telegram_app.failures) == 1
+
+
+async def test_migration(
+    bot: Bot,
+    policy: RetryPolicy,
+    telegram_app: TelegramApp,
+) -> None:
+    telegram_app.failures.append(make_failure(400, migrate_to_chat_id=-100))
+
+    sent = await bot.sendMessage(chat_id=-1, text="text")
+
+    assert sent.chat.id == -100
+    assert policy.counters == {RetryPolicy.MIGRATED: 1}
+
+
+async def test_network_error() -> None:
+    policy = RetryPolicy(jitter=lambda: 0)
+    bot = Bot("token", retry_policy=policy)
+    bot.TELEGRAM_BOT_API_URL = "http://127.0.0.1:1"
+
+    with pytest.raises(Bot.RequestError):
+        await bot.getMe()
+
+    assert policy.counters == {RetryPolicy.NETWORK: 2}
+
+
+async def test_no_policy(test_bot: Bot, telegram_app: TelegramApp) -> None:
+    telegram_app.failures.append(make_failure(429, retry_after=0))
+
+    with pytest.raises(Bot.RequestError, match="failure 429"):
+        await test_bot.getMe()
@@ -0,0 +1,208 @@
+import asyncio
+import logging
+from typing import Callable
+
+import pytest
+
+from oyabun.bot import Bot
+from oyabun.polling import LongPolling
+from oyabun.telegram import Update
+from samurai.dispatcher import Dispatcher
+from tests.bot_test_app import TelegramApp
+
+pytestmark = [
+    pytest.mark.asyncio,
+]
+
+
+def make_update(update_id: int, user_id: int = 1) -> Update:
+    return Update.parse_obj(
+        {
+            "update_id": update_id,
+            "message": {
+                "chat": {"id": user_id, "type": "private"},
+                "date": 0,
+                "from": {"first_name": "fn", "id": user_id, "is_bot": False},
+                "message_id": update_id,
+                "text": f"text {update_id}",
+            },
+        }
+    )
+
+
+async def wait_until(predicate: Callable[[], bool]) -> None:
+    async def wait() -> None:
+        while not predicate():
+            await asyncio.sleep(0.01)
+
+    await asyncio.wait_for(wait(), 5)
+
+
+async def settle() -> None:
+    # lets all the ready tasks run
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+async def test_same_key_order() -> None:
+    handled: list[int] = []
+
+    async def handle(update: Update) -> None:
+        # the later updates would overtake the earlier ones if concurrent
+        await asyncio.sleep(0.01 * (13 - update.update_id))
+        handled.append(update.update_id)
+
+    async with Dispatcher(handle, workers=4) as dispatcher:
+        for update_id in (10, 11, 12):
+            await dispatcher.submit(make_update(update_id))
+
+    assert handled == [10, 11, 12]
+    assert dispatcher.offset == 13
+
+
+async def test_keys_concurrency() -> None:
+    blocker = asyncio.Event()
+    handled: list[int] = []
+
+    async def handle(update: Update) -> None:
+        if update.update_id == 10:
+            await blocker.wait()
+        handled.append(update.update_id)
+
+    async with Dispatcher(handle, workers=2) as dispatcher:
+        await dispatcher.submit(make_update(10, user_id=1))
+        await dispatcher.submit(make_update(11, user_id=2))
+        await dispatcher.submit(make_update(12, user_id=1))
+        await settle()
+
+        # the user 2 is not held by the blocked user 1
+        assert handled == [11]
+
+        # the offset stops at the unfinished lower id
+        assert dispatcher.offset == 0
+        assert dispatcher.pending == 3
+
+        blocker.set()
+
+    assert handled == [11, 10, 12]
+    assert dispatcher.offset == 13
+    assert dispatcher.pending == 0
+
+
+async def test_stale_and_duplicate_updates() -> None:
+    blocker = asyncio.Event()
+    handled: list[int] = []
+
+    async def handle(update: Update) -> None:
+        await blocker.wait()
+        handled.append(update.update_id)
+
+    async with Dispatcher(handle, offset=10) as dispatcher:
+        for update_id in (9, 10, 10, 11):
+            await dispatcher.submit(make_update(update_id))
+
+        assert dispatcher.pending == 2
+        blocker.set()
+
+    for update_id in (10, 11):
+        await dispatcher.submit(make_update(update_id))
+
+    assert handled == [10, 11]
+    assert dispatcher.pending == 0
+
+
+async def test_backpressure() -> None:
+    blocker = asyncio.Event()
+
+    async def handle(_update: Update) -> None:
+        await blocker.wait()
+
+    async with Dispatcher(handle, max_pending=2, workers=4) as dispatcher:
+        for update_id in (10, 11):
+            await dispatcher.submit(make_update(update_id, user_id=update_id))
+
+        submit = asyncio.create_task(dispatcher.submit(make_update(12)))
+        await settle()
+
+        assert not submit.done()
+        assert dispatcher.pending == 2
+
+        blocker.set()
+        await submit
+
+    assert dispatcher.offset == 13
+
+
+async def test_failed_update(caplog: pytest.LogCaptureFixture) -> None:
+    handled: list[int] = []
+
+    async def handle(update: Update) -> None:
+        if update.update_id == 11:
+            raise RuntimeError("failed")
+        handled.append(update.update_id)
+
+    with caplog.at_level(logging.ERROR, logger="samurai.dispatcher"):
+        async with Dispatcher(handle) as dispatcher:
+            for update_id in (10, 11, 12):
+                await dispatcher.submit(make_update(update_id))
+
+    # the failed update is dropped, the next ones are not held
+    assert handled == [10, 12]
+    assert dispatcher.failed == 1
+    assert dispatcher.offset == 13
+    assert "update 11 is dropped" in caplog.text
+
+
+async def test_polling_blocked_user(
+    test_bot: Bot,
+    telegram_app: TelegramApp,
+) -> None:
+    blocker = asyncio.Event()
+    handled: list[int] = []
+
+    async def handle(update: Update) -> None:
+        if update.get_user().id == 1:
+            await blocker.wait()
+        handled.append(update.update_id)
+
+    async def commit(offset: int) -> None:
+        polling.commit(offset)
+
+    polling = LongPolling(
+        test_bot,
+        auto_commit=False,
+        idle_delay=0.01,
+        min_limit=1,
+        timeout=0,
+    )
+    dispatcher = Dispatcher(handle, on_offset=commit)
+
+    async def consume() -> None:
+        async for updates in polling.batches():
+            for update in updates:
+                await dispatcher.submit(update)
+
+    telegram_app.updates = [make_update(10, user_id=1)]
+    async with dispatcher, polling:
+        consumer = asyncio.create_task(consume())
+        try:
+            await wait_until(lambda: dispatcher.pending > 0)
+
+            # the user 2 comes in the next batch while the user 1 is busy
+            telegram_app.updates.append(make_update(11, user_id=2))
+            await wait_until(lambda: bool(handled))
+
+            assert handled == [11]
+            assert dispatcher.offset == 0
+            assert polling.offset is None
+
+            blocker.set()
+            await wait_until(lambda: polling.offset == 12)
+        finally:
+            blocker.set()
+            consumer.cancel()
+            await asyncio.gather(consumer, return_exceptions=True)
+            telegram_app.updates = []
+
+    assert handled == [11, 10]
+    assert dispatcher.offset == 12
@@ -0,0 +1,75 @@
+import asyncio
+import threading
+from concurrent.futures import Executor
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+from samurai import imaging
+from samurai.imaging import ImageProcessor
+
+pytestmark = [
+    pytest.mark.asyncio,
+]
+
+
+def make_image(image_format: str) -> bytes:
+    image = Image.new("RGB", (4, 2), color=(200, 50, 10))
+    buffer = BytesIO()
+    image.save(buffer, format=image_format)
+    return buffer.getvalue()
+
+
+async def test_to_noir() -> None:
+    async with ImageProcessor(max_workers=1) as processor:
+        processed = await processor.to_noir(make_image("PNG"))
+
+    with Image.open(BytesIO(processed)) as image:
+        assert image.format == "PNG"
+        assert image.mode == "RGB"
+        assert image.size == (4, 2)
+
+        red, green, blue = image.getpixel((0, 0))  # type: ignore
+        assert red == green == blue
+
+
+async def test_max_pending(monkeypatch: pytest.MonkeyPatch) -> None:
+    release = threading.Event()
+    running: list[bytes] = []
+
+    def block(data: bytes) -> bytes:
+        running.append(data)
+        release.wait(5)
+        return data
+
+    class Processor(ImageProcessor):
+        executor = ThreadPoolExecutor(max_workers=8)
+
+        @property
+        def _executor(self) -> Executor:  # type: ignore
+            return self.executor
+
+    monkeypatch.setattr(imaging, "to_noir", block)
+
+    processor = Processor(max_pending=2)
+    tasks = [
+        asyncio.create_task(processor.to_noir(bytes([_i]))) for _i in range(5)
+    ]
+
+    while len(running) < 2:
+        await asyncio.sleep(0.01)
+    await asyncio.sleep(0.05)
+
+    # only max_pending images reach the pool, the others wait
+    assert len(running) == 2
+    assert processor.queue_depth == 5
+
+    release.set()
+    results = await asyncio.gather(*tasks)
+
+    assert results == [bytes([_i]) for _i in range(5)]
+    assert processor.queue_depth == 0
+
+    Processor.executor.shutdown()
@@ -0,0 +1,79 @@
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from oyabun.bot import Bot
+from oyabun.telegram import Message
+from oyabun.telegram import Update
+from samurai.fsm import actions
+from samurai.fsm.machine import FSM
+from samurai.persistence import JsonStorage
+from samurai.persistence import Persistence
+from samurai.states import State
+
+pytestmark = [
+    pytest.mark.asyncio,
+]
+
+MESSAGE = {
+    "chat": {"id": 1, "type": "private"},
+    "date": 1660272310,
+    "from": {"first_name": "fn", "id": 1, "is_bot": False},
+    "message_id": 1,
+    "text": "text",
+}
+
+
+@pytest.fixture
+def replies(monkeypatch: pytest.MonkeyPatch, test_bot: Bot) -> list[str]:
+    texts: list[str] = []
+    send_message = test_bot.sendMessage
+
+    async def spy(**kw: Any) -> Message:
+        texts.append(kw["text"])
+        return await send_message(**kw)
+
+    async def edit_message_text(**kw: Any) -> None:
+        texts.append(kw["text"])
+
+    monkeypatch.setattr(test_bot, "sendMessage", spy)
+    monkeypatch.setattr(test_bot, "editMessageText", edit_message_text)
+
+    return texts
+
+
+@pytest.fixture
+def fsm(test_bot: Bot, tmp_path: Path) -> FSM:
+    db = Persistence(JsonStorage(tmp_path / "db.json"))
+    fsm = FSM(db, test_bot)
+    fsm.register(State.FINISHED, State.NOT_STARTED, actions.Restart)
+    return fsm
+
+
+async def test_restart(fsm: FSM, replies: list[str]) -> None:
+    update = Update.parse_obj({"message": MESSAGE, "update_id": 1})
+
+    assert await fsm.transit(State.FINISHED, update) == State.NOT_STARTED
+    assert len(replies) == 2
+    assert replies[0].startswith("If you want to restart the test")
+
+
+async def test_restart_not_message(fsm: FSM, replies: list[str]) -> None:
+    update = Update.parse_obj(
+        {
+            "callback_query": {
+                "chat_instance": "ci",
+                "data": "data",
+                "from": MESSAGE["from"],
+                "id": "id",
+                "message": MESSAGE,
+            },
+            "update_id": 1,
+        }
+    )
+
+    # not ignored: the user is told about the error
+    assert await fsm.transit(State.FINISHED, update) == State.FINISHED
+    assert len(replies) == 1
+    assert replies[0].startswith("ERROR:")
@@ -0,0 +1,301 @@
+import asyncio
+import sqlite3
+from pathlib import Path
+from typing import Any
+from typing import Collection
+from typing import Mapping
+
+import orjson
+import pytest
+
+from samurai.persistence import Persistence
+from samurai.persistence import SqliteStorage
+from samurai.persistence import Storage
+from samurai.persistence import WriteBackCache
+
+pytestmark = [pytest.mark.asyncio]
+
+
+class MemoryStorage(Storage):
+    """
+    Keeps everything in memory and records the calls.
+    """
+
+    def __init__(self) -> None:
+        self.loads: list[Collection[str]] = []
+        self.offset = 0
+        self.states: dict[str, str] = {}
+        self.stores: list[tuple[dict[str, str], None | int]] = []
+
+    async def load_state(self, user_id: str) -> None | str:
+        self.loads.append([user_id])
+        return self.states.get(user_id)
+
+    async def load_states(
+        self,
+        user_ids: Collection[str],
+    ) -> dict[str, None | str]:
+        self.loads.append(sorted(user_ids))
+        return {_id: self.states.get(_id) for _id in user_ids}
+
+    async def load_updates_offset(self) -> int:
+        return self.offset
+
+    async def store(
+        self,
+        *,
+        states: Mapping[str, str],
+        updates_offset: None | int = None,
+    ) -> None:
+        self.stores.append((dict(states), updates_offset))
+        self.states.update(states)
+        if updates_offset is not None:
+            self.offset = updates_offset
+
+
+def write_legacy(path: Path) -> None:
+    data = {
+        "updates_offset": 42,
+        "user_states": {"1": "a", "2": "b"},
+    }
+    path.write_bytes(orjson.dumps(data))
+
+
+async def test_sqlite_migration(tmp_path: Path) -> None:
+    legacy = tmp_path / "legacy.json"
+    write_legacy(legacy)
+
+    storage = SqliteStorage(tmp_path / "db.sqlite3", legacy=legacy)
+    try:
+        assert await storage.load_updates_offset() == 42
+        assert await storage.load_states(["1", "2", "3"]) == {
+            "1": "a",
+            "2": "b",
+            "3": None,
+        }
+
+        await storage.store(states={"1": "c"}, updates_offset=43)
+    finally:
+        await storage.close()
+
+    # migrated once: the stored data is not overwritten by the legacy one
+    storage = SqliteStorage(tmp_path / "db.sqlite3", legacy=legacy)
+    try:
+        assert await storage.load_updates_offset() == 43
+        assert await storage.load_state("1") == "c"
+    finally:
+        await storage.close()
+
+
+async def test_sqlite_migration_failed(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    legacy = tmp_path / "legacy.json"
+    write_legacy(legacy)
+
+    upsert = SqliteStorage._upsert
+
+    def fail(db: sqlite3.Connection, *args: Any) -> None:
+        upsert(db, *args)
+        raise RuntimeError("failed")
+
+    monkeypatch.setattr(SqliteStorage, "_upsert", staticmethod(fail))
+
+    storage = SqliteStorage(tmp_path / "db.sqlite3", legacy=legacy)
+    try:
+        with pytest.raises(RuntimeError):
+            await storage.load_updates_offset()
+    finally:
+        await storage.close()
+
+    # the database file is left, but the migration is not recorded
+    assert (tmp_path / "db.sqlite3").is_file()
+
+    monkeypatch.setattr(SqliteStorage, "_upsert", staticmethod(upsert))
+
+    storage = SqliteStorage(tmp_path / "db.sqlite3", legacy=legacy)
+    try:
+        assert await storage.load_updates_offset() == 42
+        assert await storage.load_state("2") == "b"
+    finally:
+        await storage.close()
+
+
+async def test_persistence_commit() -> None:
+    storage = MemoryStorage()
+    db = Persistence(storage, flush_interval=60)
+
+    db.stage_state(10, 1, "a")
+    db.stage_state(11, 2, "b")
+    db.stage_state(12, 1, "c")
+
+    # staged states are seen by the next updates, but not stored
+    assert await db.load_state(1) == "c"
+    assert await db.load_state(2) == "b"
+
+    await db.commit(12)
+    await db.flush()
+
+    # the update 12 may come again: its state is not stored
+    assert storage.stores == [({"1": "a", "2": "b"}, 12)]
+    assert await db.load_state(1) == "c"
+
+    # stale offsets are ignored
+    await db.commit(11)
+    await db.commit(13)
+    await db.close()
+
+    assert storage.stores[1:] == [({"1": "c"}, 13)]
+    assert await db.load_state(1) == "c"
+
+
+async def test_batch() -> None:
+    storage = MemoryStorage()
+    storage.states = {"1": "a", "2": "b"}
+    cache = WriteBackCache(storage, interval=0.01)
+
+    async with cache.batch(["1", "2"]):
+        assert storage.loads == [["1", "2"]]
+
+        async with cache.batch():
+            await cache.store(states={"1": "c"})
+
+        await cache.store(states={"2": "d"}, updates_offset=10)
+
+        # periodic flushes are suspended, the inner batch is not flushed
+        await asyncio.sleep(0.05)
+        assert storage.stores == []
+
+    assert storage.stores == [({"1": "c", "2": "d"}, 10)]
+
+    await asyncio.sleep(0.05)
+    await cache.close()
+
+    assert len(storage.stores) == 1
+
+
+async def test_batch_failed() -> None:
+    storage = MemoryStorage()
+    cache = WriteBackCache(storage, interval=60)
+
+    with pytest.raises(RuntimeError):
+        async with cache.batch(["1"]):
+            await cache.store(states={"1": "a"})
+            raise RuntimeError("failed")
+
+    # the changes are not flushed, but they are kept
+    assert storage.stores == []
+    assert cache.is_dirty
+
+    await cache.close()
+
+    assert storage.stores == [({"1": "a"}, None)]
+
+
+async def test_cache_hits() -> None:
+    storage = MemoryStorage()
+    storage.states = {"1": "a"}
+    cache = WriteBackCache(storage, interval=60)
+
+    assert await cache.load_state("1") == "a"
+    assert await cache.load_state("1") == "a"
+    assert await cache.load_states(["1", "2"]) == {"1": "a", "2": None}
+    assert await cache.load_states(["1", "2"]) == {"1": "a", "2": None}
+
+    await cache.store(states={"3": "c"})
+    assert await cache.load_state("3") == "c"
+
+    assert storage.loads == [["1"], ["2"]]
+
+    await cache.close()
+
+
+async def test_flush() -> None:
+    storage = MemoryStorage()
+    cache = WriteBackCache(storage, interval=60)
+
+    await cache.store(states={"1": "a", "2": "b"})
+    await cache.store(states={"1": "c"}, updates_offset=10)
+    assert cache.is_dirty
+
+    await cache.flush()
+    await cache.flush()
+
+    assert storage.stores == [({"1": "c", "2": "b"}, 10)]
+    assert not cache.is_dirty
+
+    await cache.close()
+
+    assert len(storage.stores) == 1
+
+
+async def test_flush_failed() -> None:
+    class FailingStorage(MemoryStorage):
+        async def store(self, **kw: Any) -> None:
+            if not self.stores:
+                # newer changes come while flushing
+                await cache.store(states={"1": "c"}, updates_offset=11)
+                self.stores.append(({}, None))
+                raise RuntimeError("failed")
+
+            await super().store(**kw)
+
+    storage = FailingStorage()
+    cache = WriteBackCache(storage, interval=60)
+
+    await cache.store(states={"1": "a", "2": "b"}, updates_offset=10)
+
+    with pytest.raises(RuntimeError):
+        await cache.flush()
+
+    # the failed changes are merged back under the newer ones
+    assert cache.is_dirty
+    await cache.flush()
+
+    assert storage.stores[1:] == [({"1": "c", "2": "b"}, 11)]
+    assert await cache.load_state("1") == "c"
+
+    await cache.close()
+
+
+async def test_flush_failed_offset() -> None:
+    class FailingStorage(MemoryStorage):
+        async def store(self, **kw: Any) -> None:
+            if not self.stores:
+                self.stores.append(({}, None))
+                raise RuntimeError("failed")
+
+            await super().store(**kw)
+
+    storage = FailingStorage()
+    cache = WriteBackCache(storage, interval=60)
+
+    await cache.store(states={"1": "a"}, updates_offset=10)
+
+    with pytest.raises(RuntimeError):
+        await cache.flush()
+
+    await cache.close()
+
+    assert storage.stores[1:] == [({"1": "a"}, 10)]
+
+
+async def test_periodic_flush() -> None:
+    storage = MemoryStorage()
+    cache = WriteBackCache(storage, interval=0.01)
+
+    await cache.store(states={"1": "a"}, updates_offset=10)
+
+    async def flushed() -> None:
+        while not storage.stores:
+            await asyncio.sleep(0.01)
+
+    await asyncio.wait_for(flushed(), 5)
+
+    assert storage.stores == [({"1": "a"}, 10)]
+    assert not cache.is_dirty
+
+    await cache.close()
+
+    assert len(storage.stores) == 1
@@ -0,0 +1,113 @@
+from typing import Any
+from typing import Callable
+
+import pytest
+
+from oyabun.telegram import get_lazy_type
+from oyabun.telegram import get_slots_type
+from oyabun.telegram import Update
+from samurai.fsm.routing import Filter
+from samurai.fsm.routing import Router
+
+TEXT_UPDATE = {
+    "message": {
+        "chat": {"id": 1, "type": "private"},
+        "date": 1660272310,
+        "message_id": 1,
+        "text": "text",
+    },
+    "update_id": 1,
+}
+
+# routing must not depend on the model backend
+decoders = pytest.mark.parametrize(
+    "decode",
+    [
+        Update.parse_obj,
+        Update.decode,
+        get_lazy_type(Update).decode,
+        get_slots_type(Update).decode,
+    ],
+    ids=["pydantic", "trusted", "lazy", "slots"],
+)
+
+
+@decoders
+def test_route_content_type(decode: Callable[[dict], Any]) -> None:
+    router: Router[str] = Router()
+    router.add(
+        [Filter(kind="message", content_types=frozenset({"text"}))], "T"
+    )
+    router.add(
+        [Filter(kind="message", content_types=frozenset({"photo"}))], "P"
+    )
+
+    assert router.route(decode(TEXT_UPDATE)) == ["T"]
+
+    callback_query = {
+        "callback_query": {
+            "chat_instance": "ci",
+            "data": "data",
+            "from": {"first_name": "fn", "id": 1, "is_bot": False},
+            "id": "id",
+        },
+        "update_id": 2,
+    }
+    router.add(
+        [Filter(kind="callback_query", content_types=frozenset({"text"}))],
+        "C",
+    )
+    assert router.route(decode(callback_query)) == []
+
+
+@decoders
+def test_route_callback_query_with_message(
+    decode: Callable[[dict], Any],
+) -> None:
+    router: Router[str] = Router()
+    router.add(
+        [
+            Filter(
+                kind="callback_query",
+                callback_data_prefixes=("",),
+                with_message=True,
+            )
+        ],
+        "M",
+    )
+
+    callback_query: dict[str, Any] = {
+        "chat_instance": "ci",
+        "data": "data",
+        "from": {"first_name": "fn", "id": 1, "is_bot": False},
+        "id": "id",
+    }
+    update = {"callback_query": callback_query, "update_id": 1}
+    assert router.route(decode(update)) == []
+
+    callback_query["message"] = TEXT_UPDATE["message"]
+    assert router.route(decode(update)) == ["M"]
+
+
+@decoders
+def test_route_empty_callback_data(decode: Callable[[dict], Any]) -> None:
+    router: Router[str] = Router()
+    router.add(
+        [Filter(kind="callback_query", callback_data_prefixes=("",))], "A"
+    )
+    router.add(
+        [Filter(kind="callback_query", callback_data_prefixes=("x",))], "X"
+    )
+
+    update = {
+        "callback_query": {
+            "chat_instance": "ci",
+            "data": "",
+            "from": {"first_name": "fn", "id": 1, "is_bot": False},
+            "id": "id",
+        },
+        "update_id": 1,
+    }
+
+    # the empty prefix matches any data, the empty one too
+    assert router.route(decode(update)) == ["A"]
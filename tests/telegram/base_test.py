@@ -1,8 +1,16 @@
 from datetime import datetime
 from datetime import timezone
+from io import BytesIO
+from pathlib import Path
+from typing import Any
+from typing import ClassVar
+from typing import Optional
 
+import orjson
+import pytest
 from pydantic import Field
 
+from oyabun import telegram
 from oyabun.telegram import base
 
 
@@ -95,3 +103,255 @@ def test_response() -> None:
     assert base.Response.parse_obj({"ok": "off"}) == {"ok": False}
     assert base.Response.parse_obj({"ok": "no"}) == {"ok": False}
     assert base.Response.parse_obj({"ok": "false"}) == {"ok": False}
+
+
+def test_input_file_build() -> None:
+    input_file = base.InputFile(b"", filename="f")
+    assert base.InputFile.build(input_file) is input_file
+
+    for value in (
+        b"",
+        bytearray(),
+        memoryview(b""),
+        BytesIO(),
+    ):
+        obj = base.InputFile.build(value)
+        assert obj is not None
+        assert obj.content is value
+        assert obj.filename == base.InputFile.DEFAULT_FILENAME
+        assert obj.content_type == base.InputFile.DEFAULT_CONTENT_TYPE
+
+    obj = base.InputFile.build(Path("dir/file.png"))
+    assert obj is not None
+    assert obj.filename == "file.png"
+    assert obj.content_type == "image/png"
+
+    for other in (None, "file_id", 1, base.Request()):
+        assert base.InputFile.build(other) is None
+
+
+def test_request_files(tmp_path: Path) -> None:
+    class Klass(base.Request):
+        INPUT_FILE_FIELDS: ClassVar[frozenset[str]] = frozenset(
+            {"file1", "file2"}
+        )
+
+        attr: int = Field(...)
+        file1: Any = Field(...)
+        file2: Any = Field(...)
+
+    path = tmp_path / "file"
+    path.write_bytes(b"path")
+
+    obj = Klass(attr=1, file1=path, file2=b"bytes")
+    assert obj.dict() == {"attr": 1}
+
+    with obj.files() as files:
+        assert set(files) == {"file1", "file2"}
+        assert files["file1"].content.read() == b"path"  # type: ignore
+        assert files["file2"].content == b"bytes"
+        stream = files["file1"].content
+
+    assert stream.closed  # type: ignore
+
+
+def test_request_input_file_fields() -> None:
+    class Klass(base.Request):
+        INPUT_FILE_FIELDS: ClassVar[frozenset[str]] = frozenset({"file"})
+
+        file: Any = Field(None)
+        data: Any = Field(None)
+
+    obj = Klass(file=b"file", data="data")
+    assert set(obj._get_input_files()) == {"file"}
+    assert obj.jsonb() == b'{"data":"data"}'
+
+    assert not telegram.SendMessageRequest.INPUT_FILE_FIELDS
+    assert telegram.SendPhotoRequest.INPUT_FILE_FIELDS == {"photo"}
+    assert "INPUT_FILE_FIELDS" not in Klass.__fields__
+
+    with pytest.raises(AssertionError, match="unknown input file fields"):
+
+        class Invalid(base.Request):
+            INPUT_FILE_FIELDS: ClassVar[frozenset[str]] = frozenset({"file"})
+
+
+def test_request_form_fields() -> None:
+    class Klass(base.Request):
+        INPUT_FILE_FIELDS: ClassVar[frozenset[str]] = frozenset({"file"})
+
+        attr1: str = Field(...)
+        attr2: int = Field(...)
+        attr3: bool = Field(...)
+        attr4: list[int] = Field(...)
+        file: Any = Field(...)
+
+    obj = Klass(attr1="1", attr2=2, attr3=True, attr4=[4], file=b"")
+
+    assert obj.form_fields() == {
+        "attr1": "1",
+        "attr2": "2",
+        "attr3": "true",
+        "attr4": "[4]",
+    }
+
+
+def test_request_template() -> None:
+    class Klass(base.Request):
+        attr: str = Field(...)
+        chat_id: int | str = Field(...)
+        reply_to_chat_id: None | int = Field(None)
+
+    obj = Klass(attr='"chat_id":0', chat_id=1, reply_to_chat_id=0)
+    template = base.RequestTemplate(obj)
+
+    for chat_id in (1, -1001, "@channel"):
+        expected = Klass(
+            attr='"chat_id":0',
+            chat_id=chat_id,
+            reply_to_chat_id=0,
+        ).jsonb()
+
+        assert template.render(chat_id) == expected
+
+        prepared = template.bind(chat_id)
+        assert prepared.chat_id == chat_id
+        assert prepared.jsonb() == expected
+
+    migrated = template.bind(1).copy(update={"chat_id": 2})
+    assert migrated.jsonb() == template.render(2)
+
+
+def test_cached_json_type() -> None:
+    class Item(base.CachedJsonType):
+        attr: int = Field(...)
+
+    class Klass(base.Request):
+        attr: int = Field(0)
+        item: None | Item = Field(None)
+        items: None | list[Item] = Field(None)
+
+    item = Item(attr=1)
+    assert item.jsonb() is item.jsonb()
+
+    obj = Klass(item=item)
+    assert obj.item is item
+    assert obj.jsonb() == b'{"item":{"attr":1}}'
+    assert obj.json() == '{"item":{"attr":1}}'
+
+    item.attr = 2
+    assert obj.jsonb() == b'{"item":{"attr":2}}'
+    assert item.copy(update={"attr": 3}).jsonb() == b'{"attr":3}'
+
+    obj = Klass(attr=1, item=item, items=[item, Item(attr=3)])
+    assert orjson.loads(obj.jsonb()) == {
+        "attr": 1,
+        "item": {"attr": 2},
+        "items": [{"attr": 2}, {"attr": 3}],
+    }
+    assert obj.dict() == {
+        "attr": 1,
+        "item": {"attr": 2},
+        "items": [{"attr": 2}, {"attr": 3}],
+    }
+
+
+def test_cached_json_type_nested_changes() -> None:
+    class Item(base.TelegramBotApiType):
+        attr: int = Field(...)
+
+    class Markup(base.CachedJsonType):
+        rows: list[list[Item]] = Field(...)
+
+    class Klass(base.Request):
+        markup: Markup = Field(...)
+
+    item = Item(attr=1)
+    markup = Markup(rows=[[item]])
+    obj = Klass(markup=markup)
+    assert obj.jsonb() == b'{"markup":{"rows":[[{"attr":1}]]}}'
+    assert markup.jsonb() is markup.jsonb()
+
+    item.attr = 2
+    assert obj.jsonb() == b'{"markup":{"rows":[[{"attr":2}]]}}'
+
+    markup.rows[0].append(Item(attr=3))
+    assert obj.jsonb() == b'{"markup":{"rows":[[{"attr":2},{"attr":3}]]}}'
+
+    markup.rows.clear()
+    assert obj.jsonb() == b'{"markup":{"rows":[]}}'
+
+
+def test_decode() -> None:
+    class Item(base.TelegramBotApiType):
+        attr: int = Field(...)
+
+    class Klass(base.TelegramBotApiType):
+        at: datetime = Field(...)
+        from_: None | Item = Field(None, alias="from")
+        id_or_item: None | int | Item = Field(None)
+        items: list[list[Item]] = Field(default_factory=list)
+        klass: Optional["Klass"] = Field(None)
+
+    Klass.update_forward_refs(Klass=Klass)
+
+    data = {
+        "at": 1660272310,
+        "from": {"attr": 1},
+        "id_or_item": {"attr": 2},
+        "items": [[{"attr": 3}]],
+        "klass": {"at": "2022-08-12T02:45:10Z"},
+        "unknown": 0,
+    }
+
+    obj = Klass.decode(data)
+    del data["unknown"]
+    expected = Klass.parse_obj(data)
+
+    assert obj == expected
+    assert obj.jsonb() == expected.jsonb()
+    assert obj.__fields_set__ == expected.__fields_set__
+    assert isinstance(obj.id_or_item, Item)
+    assert obj.klass is not None
+    assert obj.klass.at == obj.at
+    assert obj.klass.items == [] and obj.klass.items is not obj.items
+
+
+def test_request_serializer() -> None:
+    entity = telegram.MessageEntity(length=1, offset=0, type="bold")
+    keyboard = telegram.InlineKeyboardMarkup(
+        inline_keyboard=[[telegram.InlineKeyboardButton(text="b", url="u")]]
+    )
+
+    requests: list[base.Request] = [
+        telegram.AnswerCallbackQueryRequest(callback_query_id="q", text="t"),
+        telegram.EditMessageTextRequest(
+            chat_id="@c",
+            entities=[entity],
+            message_id=1,
+            reply_markup=keyboard,
+            text='"тест"\n',
+        ),
+        telegram.GetMeRequest(),
+        telegram.GetUpdatesRequest(allowed_updates=["message"], offset=-1),
+        telegram.SendMediaGroupRequest(
+            chat_id=1,
+            media=[telegram.InputMediaPhoto(media="file_id", caption="c")],
+        ),
+        telegram.SendMessageRequest(
+            chat_id=1,
+            disable_notification=False,
+            parse_mode=None,
+            reply_markup=telegram.ForceReply(force_reply=True),
+            text="text",
+        ),
+        telegram.SendPhotoRequest(chat_id=1, photo=b"", caption_entities=[]),
+        telegram.SetWebhookRequest(certificate=BytesIO(), url="https://u"),
+    ]
+
+    for request in requests:
+        # export options force the generic export of pydantic
+        expected = request.jsonb(exclude=set())
+
+        assert request.jsonb() == expected, type(request)
+        assert request.json() == expected.decode(), type(request)
@@ -4,9 +4,11 @@ from oyabun.telegram import Chat
 from oyabun.telegram import InlineKeyboardButton
 from oyabun.telegram import InlineKeyboardMarkup
 from oyabun.telegram import KeyboardButton
+from oyabun.telegram import LazyUpdate
 from oyabun.telegram import Message
 from oyabun.telegram import ReplyKeyboardMarkup
 from oyabun.telegram import SendMessageRequest
+from oyabun.telegram import Update
 from oyabun.telegram import User
 
 
@@ -101,5 +103,45 @@ def test_reply_markup() -> None:
     assert reply_markup
 
 
+def test_lazy_update() -> None:
+    data = {
+        "message": {
+            "chat": {"id": 1, "type": "private"},
+            "date": 1660272310,
+            "entities": [{"length": 1, "offset": 0, "type": "bold"}],
+            "from": {"first_name": "fn", "id": 2, "is_bot": False},
+            "message_id": 3,
+            "reply_to_message": {
+                "chat": {"id": 1, "type": "private"},
+                "date": 1660272300,
+                "message_id": 2,
+            },
+            "text": "text",
+        },
+        "update_id": 4,
+    }
+
+    update = LazyUpdate.decode(data)
+    expected = Update.parse_obj(data)
+
+    assert isinstance(update, Update)
+    assert update.__dict__ == {}
+    assert update.__fields_set__ == expected.__fields_set__
+
+    msg = update.message
+    assert msg is not None
+    assert msg is update.message
+    assert msg.chat.id == 1
+    assert msg.from_ is not None and msg.from_.id == 2
+    assert msg.text == "text"
+    assert set(msg.__dict__) == {"chat", "from_", "text"}
+    assert update.get_chat() == expected.get_chat()
+
+    assert update.edited_message is None
+    assert update == expected
+    assert update.jsonb() == expected.jsonb()
+    assert list(msg.__dict__) == list(Message.__fields__)
+
+
 if __name__ == "__main__":
     test_reply_markup()
@@ -0,0 +1,85 @@
+import pickle
+from datetime import datetime
+from typing import Any
+
+import pytest
+
+from oyabun import telegram
+
+UPDATE = {
+    "message": {
+        "chat": {"id": 1, "type": "private"},
+        "date": 1660272310,
+        "entities": [{"length": 1, "offset": 0, "type": "bold"}],
+        "from": {"first_name": "fn", "id": 2, "is_bot": False},
+        "message_id": 3,
+        "reply_to_message": {
+            "chat": {"id": 1, "type": "private"},
+            "date": 1660272300,
+            "message_id": 2,
+        },
+        "text": "text",
+    },
+    "update_id": 4,
+}
+
+
+def test_decode() -> None:
+    cls = telegram.get_slots_type(telegram.Update)
+    assert cls is telegram.get_slots_type(telegram.Update)
+
+    update = cls.decode(UPDATE)
+    expected = telegram.Update.parse_obj(UPDATE)
+
+    assert isinstance(update, telegram.SlotsType)
+    assert not hasattr(update, "__dict__")
+    assert update == expected
+    assert update.dict() == expected.dict()
+    assert update.jsonb() == expected.jsonb()
+    assert update.json() == expected.json()
+    assert repr(update) == repr(expected)
+
+    msg = update.message
+    assert msg is not None
+    assert isinstance(msg, telegram.SlotsType)
+    assert isinstance(msg.date, datetime)
+    assert msg.from_ is not None and msg.from_.id == 2
+    assert msg.photo is None
+    assert update.get_chat() == expected.get_chat()
+
+    restored = pickle.loads(pickle.dumps(update))
+    assert type(restored) is cls
+    assert restored == expected
+
+
+def test_init() -> None:
+    # the equivalents take values of any type, as is
+    cls: Any = telegram.get_slots_type(telegram.Chat)
+    msg_cls: Any = telegram.get_slots_type(telegram.Message)
+
+    chat = cls(id=1, type="private")
+    assert chat == telegram.Chat(id=1, type="private")
+    assert chat.jsonb() == b'{"id":1,"type":"private"}'
+
+    chat.title = "title"
+    assert chat.dict() == {"id": 1, "title": "title", "type": "private"}
+
+    msg = msg_cls(**{"chat": chat, "date": 0, "from": None, "message_id": 1})
+    assert msg.from_ is None
+    assert msg.__fields_set__ == {"chat", "date", "from_", "message_id"}
+
+    with pytest.raises(TypeError, match="missing fields"):
+        cls(id=1)
+
+    with pytest.raises(TypeError, match="unexpected field"):
+        cls(id=1, type="private", unknown=0)
+
+
+def test_union() -> None:
+    cls = telegram.get_slots_type(telegram.EditMessageTextResponse)
+
+    response = cls.decode({"ok": True, "result": UPDATE["message"]})
+    assert isinstance(response.result, telegram.SlotsType)
+
+    response = cls.decode({"ok": True, "result": True})
+    assert response.result is True
@@ -0,0 +1,96 @@
+from typing import AsyncGenerator
+
+import orjson
+import pytest
+import pytest_asyncio
+from aiohttp import ClientSession
+from aiohttp.test_utils import TestServer
+
+from oyabun.webhook import Webhook
+
+pytestmark = [
+    pytest.mark.asyncio,
+]
+
+SECRET = "secret"
+
+UPDATE = {
+    "update_id": 1,
+    "message": {
+        "chat": {"id": 1, "type": "private"},
+        "date": 0,
+        "from": {"first_name": "FN", "id": 2, "is_bot": False},
+        "message_id": 1,
+        "text": "text",
+    },
+}
+
+
+@pytest.fixture
+def webhook() -> Webhook:
+    return Webhook(max_updates=1, path="/hook", secret_token=SECRET)
+
+
+@pytest_asyncio.fixture
+async def server(webhook: Webhook) -> AsyncGenerator[TestServer, None]:
+    server = TestServer(webhook.app)
+    await server.start_server()
+    yield server
+    await server.close()
+
+
+async def test_webhook(webhook: Webhook, server: TestServer) -> None:
+    headers = {Webhook.SECRET_TOKEN_HEADER: SECRET}
+
+    async with ClientSession() as session:
+        url = server.make_url("/hook")
+        body = orjson.dumps(UPDATE)
+
+        async with session.post(url, data=body, headers=headers) as resp:
+            assert resp.status == 200
+
+        assert webhook.pending == 1
+
+        async with session.post(url, data=body, headers=headers) as resp:
+            assert resp.status == 503
+
+    async for update in webhook:
+        break
+
+    assert webhook.pending == 0
+    assert update.update_id == 1
+    assert update.get_user().id == 2
+
+
+async def test_webhook_unauthorized(
+    webhook: Webhook,
+    server: TestServer,
+) -> None:
+    async with ClientSession() as session:
+        url = server.make_url("/hook")
+        body = orjson.dumps(UPDATE)
+
+        async with session.post(url, data=body) as resp:
+            assert resp.status == 401
+
+        headers = {Webhook.SECRET_TOKEN_HEADER: "wrong"}
+        async with session.post(url, data=body, headers=headers) as resp:
+            assert resp.status == 401
+
+    assert webhook.pending == 0
+
+
+async def test_webhook_bad_request(
+    webhook: Webhook,
+    server: TestServer,
+) -> None:
+    headers = {Webhook.SECRET_TOKEN_HEADER: SECRET}
+
+    async with ClientSession() as session:
+        url = server.make_url("/hook")
+
+        for body in (b"{", b"[]", b'{"update_id": "x"}'):
+            async with session.post(url, data=body, headers=headers) as rs:
+                assert rs.status == 400
+
+    assert webhook.pending == 0